@@ -109,7 +109,8 @@ const ContentDetail = () => {
       const startTime = Date.now();
       try {
         const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8000';
-        const resp = await fetch(`${API_BASE}/content?url=${encodeURIComponent(url)}`, { 
+        // Streamed as NDJSON: page metadata first, then each section as it is extracted
+        const resp = await fetch(`${API_BASE}/content?url=${encodeURIComponent(url)}&stream=ndjson`, { 
           signal: controller.signal,
           timeout: 45000 // 45 second timeout
         });
@@ -118,13 +119,40 @@ const ContentDetail = () => {
           throw new Error(`Server returned ${resp.status}: ${resp.statusText}`);
         }
         
-        const data = await resp.json();
-        if (data.status_code === 200 && data.data) {
-            setContent(data.data);
+        const handleEvent = (event) => {
+          if (event.type === 'meta') {
+            setContent({ ...event.data, sections: [], outline: [] });
             setError(null);
-        } else {
+            setIsLoading(false);
+          } else if (event.type === 'section') {
+            setContent(prev => prev && { ...prev, sections: [...prev.sections, event.section] });
+          } else if (event.type === 'outline') {
+            setContent(prev => prev && { ...prev, outline: event.outline });
+          } else if (event.type === 'done') {
+            // Keep only (and order by) the final section list
+            setContent(prev => prev && {
+              ...prev,
+              sections: event.sectionIds.map(sid => prev.sections.find(s => s.id === sid)).filter(Boolean)
+            });
+          } else if (event.type === 'error' || event.error) {
             setContent(null);
-            setError(data.error || `Failed to scrape content (${data.status_code})`);
+            setError(event.error || `Failed to scrape content (${event.status_code})`);
+          }
+        };
+
+        const reader = resp.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        while (true) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffered += decoder.decode(value, { stream: true });
+          const lines = buffered.split('\n');
+          buffered = lines.pop();
+          lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)));
+        }
+        if (buffered.trim()) {
+          handleEvent(JSON.parse(buffered));
         }
       } catch (e) {
         if (e.name !== 'AbortError') {
@@ -196,12 +224,18 @@ const ContentDetail = () => {
       }
 
       const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8000';
-      const resp = await fetch(`${API_BASE}/summarize`, {
+      const postSummary = (body) => fetch(`${API_BASE}/summarize`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ text: textForSummary })
+        body: JSON.stringify(body)
       });
-      const data = await resp.json();
+      // The server summarizes from its own cached scrape; only send the text if it no longer has this subsection
+      let resp = await postSummary({ url, section_id: subsectionId });
+      let data = await resp.json();
+      if (data.status_code === 404) {
+        resp = await postSummary({ text: textForSummary });
+        data = await resp.json();
+      }
       if (resp.ok && data.status_code === 200) {
         setSummaries(prev => ({ ...prev, [key]: data.summary }));
       } else if (data.summary) {
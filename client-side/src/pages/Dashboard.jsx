@@ -5,8 +5,10 @@ import { useAuth } from '../context/AuthContext';
 
 const Dashboard = () => {
   const [savedSearches, setSavedSearches] = useState([]);
+  const [savedCursor, setSavedCursor] = useState(null); // next_cursor of the last saved page, null = no more
   const [searchHistory, setSearchHistory] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
   const { user } = useAuth();
   const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8000';
@@ -17,31 +19,42 @@ const Dashboard = () => {
     aiAnalysisCount: 0          // number of AI summaries generated
   });
 
+  const SAVED_PAGE_SIZE = 50;
+
+  const fetchSavedPage = async (cursor, fields = 'title,link,snippet,category') => {
+    const params = new URLSearchParams({ limit: String(SAVED_PAGE_SIZE), fields });
+    if (cursor) params.set('cursor', cursor);
+    const resp = await fetch(`${API_BASE}/saved/${user.uid}?${params}`);
+    if (!resp.ok) throw new Error('Failed to load saved searches');
+    return resp.json();
+  };
+
+  const toSavedItems = (savedJson) => (savedJson.saved || savedJson.bookmarks || []).map((b, idx) => ({
+    id: b.id || b.link || idx,
+    query: b.title || b.link,
+    description: b.snippet || '',
+    timestamp: b.saved_at || b.timestamp || new Date().toISOString(),
+    resultsCount: 1,
+    category: b.category || 'General',
+    // preserve the original URL if available so Dashboard can open ContentDetail with it
+    url: b.link || b.url || ''
+  }));
+
   const loadData = async () => {
     if (!user) return;
     setLoading(true);
     setError(null);
     try {
-      const [savedResp, recentResp] = await Promise.all([
-        fetch(`${API_BASE}/saved/${user.uid}`),
+      const [savedJson, recentResp] = await Promise.all([
+        fetchSavedPage(null),
         fetch(`${API_BASE}/recent/${user.uid}`)
       ]);
-      if (!savedResp.ok) throw new Error('Failed to load saved searches');
       if (!recentResp.ok) throw new Error('Failed to load recent history');
-      const savedJson = await savedResp.json();
       const recentJson = await recentResp.json();
 
-      const saved = (savedJson.saved || savedJson.bookmarks || []).map((b, idx) => ({
-        id: b.id || b.link || idx,
-        query: b.title || b.link,
-        description: b.snippet || '',
-        timestamp: b.saved_at || b.timestamp || new Date().toISOString(),
-        resultsCount: 1,
-        category: b.category || 'General',
-        // preserve the original URL if available so Dashboard can open ContentDetail with it
-        url: b.link || b.url || ''
-      }));
+      const saved = toSavedItems(savedJson);
       setSavedSearches(saved);
+      setSavedCursor(savedJson.next_cursor || null);
 
       const history = (recentJson.recent || []).map((r, idx) => ({
         id: r.id || r.query + idx,
@@ -74,8 +87,8 @@ const Dashboard = () => {
       try { aiCount = parseInt(localStorage.getItem('hc_ai_analysis_count') || '0', 10); } catch {}
 
       setStats({
-        totalSearches: history.length,
-        savedCount: saved.length,
+        totalSearches: recentJson.total ?? history.length,
+        savedCount: savedJson.count ?? saved.length,
         recentCount: uniqueHistory.length,
         aiAnalysisCount: aiCount
       });
@@ -88,6 +101,21 @@ const Dashboard = () => {
 
   useEffect(() => { loadData(); }, [user]);
 
+  const loadMoreSaved = async () => {
+    if (!user || !savedCursor) return;
+    setLoadingMore(true);
+    try {
+      const savedJson = await fetchSavedPage(savedCursor);
+      const more = toSavedItems(savedJson);
+      setSavedSearches(prev => [...prev, ...more.filter(m => !prev.some(p => p.id === m.id))]);
+      setSavedCursor(savedJson.next_cursor || null);
+    } catch (e) {
+      setError(e.message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const deleteSavedSearch = async (id) => {
     if (!user) return;
     // optimistic UI
@@ -129,9 +157,20 @@ const Dashboard = () => {
   };
 
   const clearAllSaved = async () => {
-    // Not implemented backend bulk delete for bookmarks; fallback to per-item calls
+    if (!user) return;
+    // Not implemented backend bulk delete for bookmarks; fallback to per-item calls.
+    // Only the pages loaded so far are in state, so collect the ids of the rest first.
     const ids = savedSearches.map(s => s.id);
     setSavedSearches([]);
+    setSavedCursor(null);
+    try {
+      let cursor = savedCursor;
+      while (cursor) {
+        const page = await fetchSavedPage(cursor, 'link');
+        ids.push(...(page.saved || []).map(b => b.id).filter(id => !ids.includes(id)));
+        cursor = page.next_cursor || null;
+      }
+    } catch (e) { /* delete what we have; loadData below shows anything left */ }
     for (const id of ids) {
       try { await fetch(`${API_BASE}/bookmark/${user.uid}/${id}`, { method: 'DELETE' }); } catch {}
     }
@@ -266,6 +305,15 @@ const Dashboard = () => {
                   </div>
                 </div>
               ))}
+              {savedCursor && (
+                <button
+                  onClick={loadMoreSaved}
+                  disabled={loadingMore}
+                  className="w-full py-2 text-sm text-slate-300 hover:text-white bg-slate-800/50 hover:bg-slate-700/50 border border-slate-700/50 rounded-lg transition-colors disabled:opacity-50"
+                >
+                  {loadingMore ? 'Loading…' : `Load more (${savedSearches.length} of ${stats.savedCount})`}
+                </button>
+              )}
             </div>
           </div>
 
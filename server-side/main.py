@@ -1,25 +1,38 @@
 from fastapi import FastAPI, Request, Query
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from services.credential_pool import credential_pool_stats
 from services.google_searcher import search_google
-from services.scrape_a_link import scrape_website
+from services.search_cache import search_cache_stats
+from utils.domain_cache import domain_cache_stats
+from utils.http_client import pool_stats
+from services.summarizer import content_sections, iter_long_summary, summarize_text, summary_cache_stats
+from services.scrape_cache import get_or_scrape_async, iter_cached_scrape_events, scrape_cache_stats
+from services.batch_scraper import MAX_URLS as BATCH_MAX_URLS, iter_batch_scrape
+from services.parse_pool import parse_pool_stats, shutdown_parse_pool
+from services.warmup import start_warmup, warmup_stats
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, ServerTimingMiddleware, render_metrics
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+import asyncio
+import json
 import os
 from dotenv import load_dotenv
-from google import genai
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-client = genai.Client(api_key=GEMINI_API_KEY)
 
-from utils.firebase_manager import (
+from utils.storage import (
     store_bookmark,
-    get_bookmarks,
-    get_recent_searches,
+    get_bookmarks_page,
+    count_bookmarks,
+    get_recent_searches_page,
+    count_recent_searches,
     delete_recent_search,
     clear_recent_searches,
     delete_bookmark,
+    close_storage,
+    storage_stats,
+    user_cache_stats,
 )
 
-import requests
-
 load_dotenv()
 app = FastAPI()
 
@@ -31,7 +44,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+# Per-stage spans -> Server-Timing header and the /metrics histograms
+app.add_middleware(ServerTimingMiddleware)
 
 
 class SearchRequest(BaseModel):
@@ -39,38 +55,142 @@ class SearchRequest(BaseModel):
     user_id: str | None = None  # optional user id so we can persist recent searches
 
 
+class BatchContentRequest(BaseModel):
+    urls: list[str]
+    max_concurrency: int | None = Field(None, ge=1)  # capped by BATCH_MAX_WORKERS
+    per_host: int | None = Field(None, ge=1)         # concurrent scrapes per domain
+
+
+class SummarySection(BaseModel):
+    title: str | None = None
+    content: str = ""
+
+
 class SummarizeRequest(BaseModel):
-    text: str
+    text: str = ""
     summary_type: str = "concise"  # optional: can define multiple styles
+    sections: list[SummarySection] | None = None  # long-document mode (/summarize/stream)
+    url: str | None = None         # summarize the server's own scrape of this page instead of `text`
+    section_id: str | None = None  # optional section/subsection/outline id from that scrape
+
+
+async def sections_for_url(url: str, section_id: str | None):
+    """Resolve (sections, error) from the cached (or fresh) server-side scrape of `url`."""
+    if not url.startswith(('http://', 'https://')):
+        return None, {"status_code": 400, "error": "Invalid URL format"}
+    result = await get_or_scrape_async(url)
+    if result.get("status_code") != 200:
+        return None, {"status_code": result.get("status_code", 500), "error": result.get("error", "Failed to scrape URL")}
+    sections = content_sections(result["data"], section_id)
+    if sections is None:
+        return None, {"status_code": 404, "error": f"Section {section_id} not found"}
+    return sections, None
 
-# Example prompt styles
 
 @app.post("/summarize")
 async def summarize(req: SummarizeRequest):
-    text = (req.text or "").strip()
+    if req.url:
+        sections, error = await sections_for_url(req.url, req.section_id)
+        if error:
+            return error
+        text = "\n\n".join(content for _, content in sections if content).strip()
+    else:
+        text = (req.text or "").strip()
     if not text:
         return {"status_code": 400, "error": "No text provided"}
-    prompt_style = {
-        "concise": "Summarize in 80-100 words (plain, factual, concise):\n\n",
-        "detailed": f"Summarize with more context and details in 100 to 150 words:{text[:15000]}"
-    }
 
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=f"{prompt_style["detailed"]}"
-        )
-        return {"summary": response.text}
+        # Cached by content hash; identical concurrent requests share one Gemini call
+        summary = await summarize_text(text, req.summary_type)
+        return {"summary": summary}
     except Exception as e:
         return f"Error generating summary: {str(e)}"
 
 
+@app.post("/summarize/stream")
+async def summarize_stream(req: SummarizeRequest):
+    """Long-document summary as SSE: chunks are summarized in parallel, the merge streams token by token.
+
+    Send the scraped `sections` (title + content) to split on section boundaries,
+    plain `text` to split on paragraphs, or a `url` (and `section_id`) to use the
+    server's own scrape of that page.
+    """
+    if req.url:
+        sections, error = await sections_for_url(req.url, req.section_id)
+        if error:
+            return error
+    elif req.sections:
+        sections = [(s.title, s.content) for s in req.sections]
+    else:
+        sections = [(None, (req.text or "").strip())]
+    if not any(content.strip() for _, content in sections):
+        return {"status_code": 400, "error": "No text provided"}
+
+    async def events():
+        try:
+            async for event in iter_long_summary(sections):
+                yield format_stream_event(event, "sse")
+        except Exception as e:
+            yield format_stream_event({"type": "error", "error": f"Error generating summary: {str(e)}"}, "sse")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
 @app.post("/search")
-def google_search(request: SearchRequest):
+async def google_search(request: SearchRequest):
     """POST endpoint to search Google by keyword (and persist recent searches if user_id provided)."""
-    response = search_google(request)
+    # The CSE pipeline fans out on its own thread pools; keep it off the event loop
+    response = await run_in_threadpool(search_google, request)
     return response
 
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters for the query, domain, summary, scrape and per-user caches (for sizing)."""
+    return {"search": search_cache_stats(), "domain": domain_cache_stats(), "summary": summary_cache_stats(),
+            "scrape": scrape_cache_stats(), "user": user_cache_stats()}
+
+@app.get("/http/stats")
+def http_stats():
+    """Connection pool and per-host counters of the shared outbound HTTP client."""
+    return pool_stats()
+
+@app.get("/cse/stats")
+def get_cse_stats():
+    """CSE key pool: per-key availability, error rate and latency, and the page-2 prefetch rate."""
+    return credential_pool_stats()
+
+@app.get("/parse/stats")
+def get_parse_stats():
+    """Parse worker pool: jobs, CPU-limit hits, restarts and in-thread fallbacks."""
+    return parse_pool_stats()
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus histograms: per-stage spans (fetch, parse, cse_page, gemini, firestore_*, ...) and per-route totals."""
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/storage/stats")
+def get_storage_stats():
+    """Active storage backend and its counters (Firestore: write-behind queue and flush times)."""
+    return storage_stats()
+
+@app.get("/warmup/stats")
+def get_warmup_stats():
+    """Background warm-up (WARMUP env): selected targets and how long each took."""
+    return warmup_stats()
+
+@app.on_event("startup")
+def warm_up():
+    # Clients are lazy by default (the parse pool starts here); WARMUP=all (or e.g. genai,storage) starts them too
+    start_warmup()
+
+@app.on_event("shutdown")
+def shutdown_storage():
+    # Commit queued recent searches/bookmarks before the process exits
+    closed = close_storage()
+    print(f"{'✅' if closed else '⚠️'} Storage closed")
+    shutdown_parse_pool()
+
 @app.post("/bookmark")
 async def bookmark(request: Request):
     data = await request.json()
@@ -80,48 +200,73 @@ async def bookmark(request: Request):
         return {"status_code": 400, "detail": "Missing user_id or result data."}
 
     try:
-        store_bookmark(user_id, result)
+        await run_in_threadpool(store_bookmark, user_id, result)
         return {"status_code": 200, "detail": "Bookmarked successfully."}
     except Exception as e:
         return {"status_code": 202, "detail": f"Bookmark accepted but not persisted: {e}"}
 
 
+def parse_fields(fields: str | None):
+    return [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
 @app.get("/bookmarks/{user_id}")
-async def get_user_bookmarks(user_id: str):
-    bookmarks = get_bookmarks(user_id)
-    return {"user_id": user_id, "bookmarks": bookmarks}
+async def get_user_bookmarks(user_id: str, limit: int | None = Query(None, ge=1, le=500), cursor: str | None = None, fields: str | None = None):
+    try:
+        page = await run_in_threadpool(get_bookmarks_page, user_id, limit, cursor, parse_fields(fields))
+    except ValueError as e:
+        return {"status_code": 400, "detail": str(e)}
+    return {"user_id": user_id, "bookmarks": page["items"], "next_cursor": page["next_cursor"]}
 
 @app.get("/saved/{user_id}")
-async def get_saved_hits(user_id: str):
+async def get_saved_hits(
+    user_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    fields: str | None = Query(None, description="Comma-separated projection, e.g. title,link,favicon"),
+):
     """
-    Get all saved (bookmarked) search results for a user.
+    Get saved (bookmarked) search results for a user, newest first, one page at a time.
+    `count` is the user's total number of bookmarks.
     """
     try:
-        bookmarks = get_bookmarks(user_id)
+        page, total = await asyncio.gather(
+            run_in_threadpool(get_bookmarks_page, user_id, limit, cursor, parse_fields(fields)),
+            run_in_threadpool(count_bookmarks, user_id),
+        )
         return {
             "status_code": 200,
             "user_id": user_id,
-            "count": len(bookmarks),
-            "saved": bookmarks
+            "count": total,
+            "saved": page["items"],
+            "next_cursor": page["next_cursor"]
         }
+    except ValueError as e:
+        return {"status_code": 400, "detail": str(e)}
     except Exception as e:
         return {
             "status_code": 500,
             "detail": f"Error fetching saved results: {e}"
         }
 @app.get("/recent/{user_id}")
-async def recent_searches(user_id: str, limit: int = 10):
-    """Return recent search queries for a user (most recent first)."""
+async def recent_searches(user_id: str, limit: int = Query(10, ge=1, le=500), cursor: str | None = None, fields: str | None = None):
+    """Return recent search queries for a user (most recent first); `total` counts all of them."""
     try:
-        items = get_recent_searches(user_id, limit=limit)
-        return {"status_code": 200, "user_id": user_id, "count": len(items), "recent": items}
+        page, total = await asyncio.gather(
+            run_in_threadpool(get_recent_searches_page, user_id, limit, cursor, parse_fields(fields)),
+            run_in_threadpool(count_recent_searches, user_id),
+        )
+        items = page["items"]
+        return {"status_code": 200, "user_id": user_id, "count": len(items), "total": total,
+                "recent": items, "next_cursor": page["next_cursor"]}
+    except ValueError as e:
+        return {"status_code": 400, "detail": str(e)}
     except Exception as e:
         return {"status_code": 500, "detail": f"Error fetching recent searches: {e}"}
 
 @app.delete("/recent/{user_id}/{doc_id}")
 async def delete_recent(user_id: str, doc_id: str):
     try:
-        delete_recent_search(user_id, doc_id)
+        await run_in_threadpool(delete_recent_search, user_id, doc_id)
         return {"status_code": 200, "detail": "Recent search deleted", "id": doc_id}
     except Exception as e:
         return {"status_code": 500, "detail": f"Failed to delete recent search: {e}"}
@@ -129,21 +274,30 @@ async def delete_recent(user_id: str, doc_id: str):
 @app.delete("/recent/{user_id}")
 async def clear_recent(user_id: str):
     try:
-        clear_recent_searches(user_id)
-        return {"status_code": 200, "detail": "All recent searches cleared"}
+        deleted = await run_in_threadpool(clear_recent_searches, user_id)
+        return {"status_code": 200, "detail": "All recent searches cleared", "deleted": deleted}
     except Exception as e:
         return {"status_code": 500, "detail": f"Failed to clear recent searches: {e}"}
 
 @app.delete("/bookmark/{user_id}/{bookmark_id}")
 async def delete_user_bookmark(user_id: str, bookmark_id: str):
     try:
-        delete_bookmark(user_id, bookmark_id)
+        await run_in_threadpool(delete_bookmark, user_id, bookmark_id)
         return {"status_code": 200, "detail": "Bookmark deleted", "id": bookmark_id}
     except Exception as e:
         return {"status_code": 500, "detail": f"Failed to delete bookmark: {e}"}
 
+def format_stream_event(event: dict, mode: str) -> str:
+    payload = json.dumps(event, default=str)
+    if mode == "sse":
+        return f"event: {event['type']}\ndata: {payload}\n\n"
+    return payload + "\n"
+
 @app.get("/content")
-async def get_content(url: str = Query(..., description="URL to scrape")):
+async def get_content(
+    url: str = Query(..., description="URL to scrape"),
+    stream: str | None = Query(None, description="'ndjson' or 'sse' to receive metadata first, then sections as they are extracted"),
+):
     """Scrape and return structured content for a given URL."""
     try:
         # Validate URL
@@ -151,7 +305,13 @@ async def get_content(url: str = Query(..., description="URL to scrape")):
             return {"status_code": 400, "error": "Invalid URL format"}
         
         print(f"Content request for: {url}")
-        result = scrape_website(url)
+        if stream in ("ndjson", "sse"):
+            # Sync generator: Starlette iterates it in the threadpool, off the event loop
+            events = (format_stream_event(e, stream) for e in iter_cached_scrape_events(url))
+            media_type = "text/event-stream" if stream == "sse" else "application/x-ndjson"
+            return StreamingResponse(events, media_type=media_type, headers={"Cache-Control": "no-cache"})
+        # Cached so a later /summarize?url=... reuses this scrape
+        result = await get_or_scrape_async(url)
         print(f"Scraping completed with status: {result.get('status_code', 'unknown')}")
         return result
     except Exception as e:
@@ -159,3 +319,16 @@ async def get_content(url: str = Query(..., description="URL to scrape")):
         import traceback
         traceback.print_exc()
         return {"status_code": 500, "error": f"Server error: {str(e)}"}
+
+
+@app.post("/content/batch")
+def get_content_batch(req: BatchContentRequest):
+    """Scrape several URLs concurrently; results stream back as NDJSON as they finish."""
+    if not req.urls:
+        return {"status_code": 400, "error": "No URLs provided"}
+    if len(req.urls) > BATCH_MAX_URLS:
+        return {"status_code": 400, "error": f"At most {BATCH_MAX_URLS} URLs per batch"}
+
+    results = iter_batch_scrape(req.urls, req.max_concurrency, req.per_host)
+    lines = (format_stream_event(r, "ndjson") for r in results)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
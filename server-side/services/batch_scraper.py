@@ -0,0 +1,65 @@
+import os
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+from services.scrape_cache import get_or_scrape
+
+# Global cap shared by every batch in the process, and the default per-domain cap
+MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "8"))
+PER_HOST_LIMIT = int(os.getenv("BATCH_PER_HOST_LIMIT", "2"))
+MAX_URLS = int(os.getenv("BATCH_MAX_URLS", "20"))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="batch-scrape")
+
+
+def _scrape(index: int, url: str) -> dict:
+    # Same cache and single-flight as /content, so repeated URLs are not scraped again
+    result = get_or_scrape(url)
+    return {"index": index, "url": url, **result}
+
+
+def iter_batch_scrape(urls: list, max_concurrency: int = None, per_host: int = None):
+    """Scrape `urls` concurrently and yield each result as soon as it finishes.
+
+    At most `max_concurrency` scrapes of this batch run at once (never more than
+    the process-wide MAX_WORKERS) and at most `per_host` per domain. Every result
+    carries its own `index`, `url` and `status_code`.
+    """
+    max_concurrency = min(max_concurrency or MAX_WORKERS, MAX_WORKERS)
+    per_host = per_host or PER_HOST_LIMIT
+
+    queues = defaultdict(deque)  # host -> waiting (index, url)
+    for index, url in enumerate(urls):
+        if not url or not url.startswith(('http://', 'https://')):
+            yield {"index": index, "url": url, "status_code": 400, "error": "Invalid URL format"}
+            continue
+        queues[urlparse(url).netloc].append((index, url))
+
+    in_flight = {}  # future -> host
+    host_counts = defaultdict(int)
+
+    def fill():
+        # Round-robin over hosts so one domain cannot monopolize the batch
+        progressed = True
+        while progressed and len(in_flight) < max_concurrency:
+            progressed = False
+            for host, queue in queues.items():
+                if queue and host_counts[host] < per_host and len(in_flight) < max_concurrency:
+                    index, url = queue.popleft()
+                    in_flight[_executor.submit(_scrape, index, url)] = host
+                    host_counts[host] += 1
+                    progressed = True
+
+    try:
+        fill()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                host_counts[in_flight.pop(fut)] -= 1
+            fill()
+            for fut in done:
+                yield fut.result()
+    finally:
+        # Client went away: drop scrapes that have not started yet
+        for fut in in_flight:
+            fut.cancel()
@@ -1,14 +1,138 @@
-import requests
-from bs4 import BeautifulSoup
+import codecs
+import os
+from html.parser import HTMLParser
 from urllib.parse import urlparse
-
-def get_category_from_meta(link: str) -> str:
+from utils import http_client
+from utils.html_parser import make_soup
+
+# "head" streams only the document head; "full" downloads and parses the whole page
+FETCH_MODE = os.getenv("CATEGORY_FETCH_MODE", "head")
+HEAD_BYTE_CAP = int(os.getenv("CATEGORY_HEAD_BYTE_CAP", str(256 * 1024)))
+CHUNK_SIZE = 8192
+
+META_KEYS = ("keywords", "description", "og:description", "article:published_time")
+
+
+class HeadMetaParser(HTMLParser):
+    """Collects the <meta> tags we classify on and stops at </head> or <body>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta = {}
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "body":
+            self.done = True
+            return
+        if tag != "meta":
+            return
+        attrs = dict(attrs)
+        key = (attrs.get("name") or attrs.get("property") or "").lower()
+        content = attrs.get("content")
+        if key in META_KEYS and content and key not in self.meta:
+            self.meta[key] = content
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.done = True
+
+
+def _response_decoder(response):
+    # Without an explicit charset, utf-8 is the safest guess for HTML
+    encoding = response.charset_encoding or "utf-8"
+    try:
+        return codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def fetch_head_meta(link: str, byte_cap: int = HEAD_BYTE_CAP) -> dict:
+    """Stream the page and parse meta tags until </head> or `byte_cap` bytes."""
+    parser = HeadMetaParser()
+    with http_client.stream("GET", link, timeout=5) as response:
+        decoder = _response_decoder(response)
+        received = 0
+        for chunk in response.iter_bytes(chunk_size=CHUNK_SIZE):
+            received += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if parser.done or received >= byte_cap:
+                break
+    return parser.meta
+
+
+def fetch_full_meta(link: str) -> dict:
+    """Download the whole page and read meta tags from a full parsed tree."""
+    response = http_client.request("GET", link, timeout=5)
+    soup = make_soup(response.text)
+    meta = {}
+    for key in META_KEYS:
+        attr = "property" if ":" in key else "name"
+        tag = soup.find("meta", attrs={attr: key})
+        if tag and tag.get("content"):
+            meta[key] = tag["content"]
+    return meta
+
+
+def classify_text(text: str) -> str:
+    """Map lower-cased meta text to a coarse site category."""
+    # Simple heuristic classification based on meta content
+    if any(k in text for k in [
+        "news", "media", "journal", "press", "report", "broadcast", "headline", "magazine", "publication"
+    ]):
+        return "News"
+
+    elif any(k in text for k in [
+        "shop", "product", "buy", "ecommerce", "store", "sale", "retail", "marketplace", "shopping", "deal"
+    ]):
+        return "E-Commerce"
+
+    elif any(k in text for k in [
+        "university", "education", "learning", "school", "college", "academy", "training", "tutorial", "course", "class"
+    ]):
+        return "Education"
+
+    elif any(k in text for k in [
+        "tech", "software", "ai", "startup", "developer", "programming", "app", "website", "innovation", "technology"
+    ]):
+        return "Technology"
+
+    elif any(k in text for k in [
+        "government", "ministry", "state", "policy", "law", "official", "public sector", "regulation", "bureau"
+    ]):
+        return "Government"
+
+    elif any(k in text for k in [
+        "health", "clinic", "doctor", "medicine", "hospital", "wellness", "treatment", "medical", "disease", "pharmacy"
+    ]):
+        return "Health"
+
+    elif any(k in text for k in [
+        "movie", "film", "music", "entertainment", "tv", "celebrity", "show", "series", "concert", "game"
+    ]):
+        return "Entertainment"
+
+    elif any(k in text for k in [
+        "sport", "football", "cricket", "basketball", "tennis", "athlete", "tournament", "league", "match", "olympics"
+    ]):
+        return "Sports"
+
+    elif any(k in text for k in [
+        "science", "research", "study", "experiment", "physics", "chemistry", "biology", "lab", "discovery", "experiment"
+    ]):
+        return "Science"
+
+    else:
+        return "General"
+
+
+def get_category_from_meta(link: str, mode: str = None) -> dict:
     
     try:
-        # Fetch the homepage (timeout to avoid hanging)
-        response = requests.get(link, timeout=5)
-        html = response.text
-        soup = BeautifulSoup(html, "html.parser")
+        # Fetch only what we need to classify (timeout to avoid hanging)
+        meta = fetch_full_meta(link) if (mode or FETCH_MODE) == "full" else fetch_head_meta(link)
 
         # Extract site domain
         parsed_url = urlparse(link)
@@ -17,70 +141,17 @@ def get_category_from_meta(link: str) -> str:
             domain = domain[4:]
         site_name_tag = domain  # Use domain as site name
 
-        # Look for meta keywords or description``
-        keywords_tag = soup.find("meta", attrs={"name": "keywords"})
-        description_tag = soup.find("meta", attrs={"name": "description"})
-        og_desc_tag = soup.find("meta", attrs={"property": "og:description"})
-        publish_date_tag = soup.find("meta", attrs={"property": "article:published_time"})
-
-        publish_date_tag = publish_date_tag["content"] if publish_date_tag and publish_date_tag.get("content") else None
+        publish_date_tag = meta.get("article:published_time")
 
         text = ""
-        if keywords_tag and keywords_tag.get("content"):
-            text += keywords_tag["content"].lower() + " "
-        if description_tag and description_tag.get("content"):
-            text += description_tag["content"].lower() + " "
-        if og_desc_tag and og_desc_tag.get("content"):
-            text += og_desc_tag["content"].lower()
-
-        # Simple heuristic classification based on meta content
-        if any(k in text for k in [
-            "news", "media", "journal", "press", "report", "broadcast", "headline", "magazine", "publication"
-        ]):
-            category = "News"
-
-        elif any(k in text for k in [
-            "shop", "product", "buy", "ecommerce", "store", "sale", "retail", "marketplace", "shopping", "deal"
-        ]):
-            category = "E-Commerce"
-
-        elif any(k in text for k in [
-            "university", "education", "learning", "school", "college", "academy", "training", "tutorial", "course", "class"
-        ]):
-            category = "Education"
-
-        elif any(k in text for k in [
-            "tech", "software", "ai", "startup", "developer", "programming", "app", "website", "innovation", "technology"
-        ]):
-            category = "Technology"
-
-        elif any(k in text for k in [
-            "government", "ministry", "state", "policy", "law", "official", "public sector", "regulation", "bureau"
-        ]):
-            category = "Government"
-
-        elif any(k in text for k in [
-            "health", "clinic", "doctor", "medicine", "hospital", "wellness", "treatment", "medical", "disease", "pharmacy"
-        ]):
-            category = "Health"
-
-        elif any(k in text for k in [
-            "movie", "film", "music", "entertainment", "tv", "celebrity", "show", "series", "concert", "game"
-        ]):
-            category = "Entertainment"
-
-        elif any(k in text for k in [
-            "sport", "football", "cricket", "basketball", "tennis", "athlete", "tournament", "league", "match", "olympics"
-        ]):
-            category = "Sports"
-
-        elif any(k in text for k in [
-            "science", "research", "study", "experiment", "physics", "chemistry", "biology", "lab", "discovery", "experiment"
-        ]):
-            category = "Science"
-
-        else:
-            category = "General"
+        if meta.get("keywords"):
+            text += meta["keywords"].lower() + " "
+        if meta.get("description"):
+            text += meta["description"].lower() + " "
+        if meta.get("og:description"):
+            text += meta["og:description"].lower()
+
+        category = classify_text(text)
 
         # Return both domain and category
         return {"site": site_name_tag, "category": category, "published_date": publish_date_tag}
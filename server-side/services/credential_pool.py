@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# Google CSE daily quotas reset at midnight Pacific Time
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+except Exception:
+    QUOTA_TZ = timezone(timedelta(hours=-8))
+
+# Fetch start=1 and start=11 together once this share of searches needed page 2
+PREFETCH_THRESHOLD = float(os.getenv("CSE_PREFETCH_THRESHOLD", "0.5"))
+RATE_LIMIT_COOLDOWN = float(os.getenv("CSE_RATE_LIMIT_COOLDOWN", "60"))
+EWMA_ALPHA = 0.2
+
+
+def load_env_credentials():
+    """Load all available CSE credentials from environment variables."""
+    credentials = []
+    i = 1
+    while True:
+        api_key = os.getenv(f"CSE_API_KEY_{i}")
+        engine_id = os.getenv(f"CSE_ENGINE_ID_{i}")
+        if not api_key or not engine_id:
+            break
+        credentials.append({"CSE_API_KEY": api_key, "CSE_ENGINE_ID": engine_id})
+        i += 1
+
+    if not credentials:
+        # fallback for single set
+        key = os.getenv("CSE_API_KEY")
+        cx = os.getenv("CSE_ENGINE_ID")
+        if key and cx:
+            credentials.append({"CSE_API_KEY": key, "CSE_ENGINE_ID": cx})
+
+    if not credentials:
+        raise EnvironmentError("❌ No valid CSE_API_KEY_x / CSE_ENGINE_ID_x found in environment variables.")
+    print(f"✅ Loaded {len(credentials)} CSE credentials.")
+    return credentials
+
+
+def next_quota_reset(now: float = None) -> float:
+    """Epoch seconds of the next midnight in the quota timezone."""
+    current = datetime.fromtimestamp(now if now is not None else time.time(), QUOTA_TZ)
+    midnight = (current + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight.timestamp()
+
+
+class CredentialPool:
+    """Long-lived CSE key pool that remembers exhaustion, error rate and latency."""
+
+    def __init__(self, credentials: list):
+        self._lock = threading.Lock()
+        self._keys = [
+            {
+                "index": i,
+                "cred": cred,
+                "exhausted_until": 0.0,
+                "requests": 0,
+                "errors": 0,
+                "error_ewma": 0.0,
+                "latency_ewma": None,
+            }
+            for i, cred in enumerate(credentials, start=1)
+        ]
+        self._second_page_ewma = 0.0
+
+    def _score(self, key) -> float:
+        # Lower is better; untried keys (no latency yet) sort by position
+        latency = key["latency_ewma"] or 0.0
+        return latency * (1 + 4 * key["error_ewma"]) + key["error_ewma"]
+
+    def ordered(self) -> list:
+        """Available (index, cred) pairs, healthiest first; exhausted keys are skipped."""
+        now = time.time()
+        with self._lock:
+            live = [k for k in self._keys if k["exhausted_until"] <= now]
+            live.sort(key=lambda k: (self._score(k), k["index"]))
+            return [(k["index"], k["cred"]) for k in live]
+
+    def _update(self, index: int, error: bool, latency: float = None):
+        with self._lock:
+            key = self._keys[index - 1]
+            key["requests"] += 1
+            key["errors"] += int(error)
+            key["error_ewma"] += EWMA_ALPHA * (float(error) - key["error_ewma"])
+            if latency is not None:
+                prev = key["latency_ewma"]
+                key["latency_ewma"] = latency if prev is None else prev + EWMA_ALPHA * (latency - prev)
+
+    def record_success(self, index: int, latency: float):
+        self._update(index, error=False, latency=latency)
+
+    def record_error(self, index: int, latency: float = None):
+        self._update(index, error=True, latency=latency)
+
+    def mark_exhausted(self, index: int, cooldown: float = None):
+        """Park a key until the daily reset (or for `cooldown` seconds on a rate limit)."""
+        until = time.time() + cooldown if cooldown else next_quota_reset()
+        with self._lock:
+            key = self._keys[index - 1]
+            key["exhausted_until"] = max(key["exhausted_until"], until)
+        self._update(index, error=True)
+
+    def record_second_page(self, needed: bool):
+        """Track how often Wikipedia filtering leaves page 1 short of the target."""
+        with self._lock:
+            self._second_page_ewma += EWMA_ALPHA * (float(needed) - self._second_page_ewma)
+
+    def should_prefetch(self) -> bool:
+        return self._second_page_ewma >= PREFETCH_THRESHOLD
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            return {
+                "second_page_rate": round(self._second_page_ewma, 3),
+                "keys": [
+                    {
+                        "index": k["index"],
+                        "available": k["exhausted_until"] <= now,
+                        "exhausted_until": k["exhausted_until"] or None,
+                        "requests": k["requests"],
+                        "errors": k["errors"],
+                        "error_rate": round(k["error_ewma"], 3),
+                        "latency_ms": round(k["latency_ewma"] * 1000, 1) if k["latency_ewma"] is not None else None,
+                    }
+                    for k in self._keys
+                ],
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_credential_pool() -> CredentialPool:
+    """Process-wide pool, built from the environment on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = CredentialPool(load_env_credentials())
+    return _pool
+
+
+def credential_pool_stats() -> dict:
+    """Per-key availability, error rate and latency (no keys until the first search builds the pool)."""
+    pool = _pool
+    return pool.stats() if pool is not None else {"second_page_rate": 0.0, "keys": []}
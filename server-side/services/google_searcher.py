@@ -1,37 +1,24 @@
+import contextvars
 import os
-import requests
+import time
+import httpx
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from urllib.parse import urlparse
-from services.category_finder import get_category_from_meta
-from utils.firebase_manager import store_recent_search
+from services.credential_pool import RATE_LIMIT_COOLDOWN, get_credential_pool
+from services.result_enricher import enrich_results, resolve_pending
+from services.search_cache import cached_search
+from utils import http_client, metrics
+from utils.storage import store_recent_search
 # Load environment variables
 load_dotenv()
 
-GOOGLE_CSE_URL = "https://www.googleapis.com/customsearch/v1"
+# Overridable so load tests can point at a local CSE stand-in (tools/fake_services.py)
+GOOGLE_CSE_URL = os.getenv("GOOGLE_CSE_URL", "https://www.googleapis.com/customsearch/v1")
+TARGET_COUNT = 10
 
-def load_env_credentials():
-    """Load all available CSE credentials from environment variables."""
-    credentials = []
-    i = 1
-    while True:
-        api_key = os.getenv(f"CSE_API_KEY_{i}")
-        engine_id = os.getenv(f"CSE_ENGINE_ID_{i}")
-        if not api_key or not engine_id:
-            break
-        credentials.append({"CSE_API_KEY": api_key, "CSE_ENGINE_ID": engine_id})
-        i += 1
-
-    if not credentials:
-        # fallback for single set
-        key = os.getenv("CSE_API_KEY")
-        cx = os.getenv("CSE_ENGINE_ID")
-        if key and cx:
-            credentials.append({"CSE_API_KEY": key, "CSE_ENGINE_ID": cx})
-
-    if not credentials:
-        raise EnvironmentError("❌ No valid CSE_API_KEY_x / CSE_ENGINE_ID_x found in environment variables.")
-    print(f"✅ Loaded {len(credentials)} CSE credentials.")
-    return credentials
+# Used to request page 2 (start=11) alongside page 1
+_page_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cse-page")
 
 
 def get_favicon_url(link: str):
@@ -40,89 +27,143 @@ def get_favicon_url(link: str):
     return f"https://www.google.com/s2/favicons?sz=64&domain_url=https://{domain}"
 
 
-def search_google(request):
-    """Search a keyword using Google Custom Search API with automatic fallback + Firebase.
+def pagemap_date(item: dict):
+    """article:published_time from the CSE item's pagemap, if Google indexed one."""
+    for tags in (item.get("pagemap") or {}).get("metatags") or []:
+        if isinstance(tags, dict) and tags.get("article:published_time"):
+            return tags["article:published_time"]
+    return None
+
 
-    Returns up to 10 search results including all domains (Wikipedia now included).
-    Uses pagination to fetch results across multiple pages if needed.
+def fetch_page(pool, idx: int, cred: dict, query: str, start_index: int):
+    """Fetch one CSE page and report the outcome to the pool.
+
+    Returns ("ok", items), ("quota", None) or ("error", None).
     """
-    query = getattr(request, "query", "").strip()
-    user_id = getattr(request, "user_id", None)
-    if not query:
-        return {"status_code": 400, "detail": "Query cannot be empty."}
+    params = {
+        "key": cred["CSE_API_KEY"],
+        "cx": cred["CSE_ENGINE_ID"],
+        "q": query,
+        "start": start_index
+    }
+    started = time.monotonic()
+    try:
+        with metrics.span("cse_page"):
+            response = http_client.request("GET", GOOGLE_CSE_URL, params=params, timeout=10,
+                                           extensions=metrics.http_trace("cse"))
+    except httpx.HTTPError as e:
+        pool.record_error(idx)
+        print(f"⚠️ Network error for key #{idx} (start={start_index}): {e}")
+        return "error", None
+    latency = time.monotonic() - started
+
+    if response.status_code == 200:
+        pool.record_success(idx, latency)
+        return "ok", response.json().get("items", [])
+    body = response.text.lower()
+    if response.status_code in (403, 429) and "quota" in body:
+        if "per minute" in body:
+            print(f"🚫 Rate limited on API key #{idx}, cooling down...")
+            pool.mark_exhausted(idx, cooldown=RATE_LIMIT_COOLDOWN)
+        else:
+            print(f"🚫 Quota exceeded for API key #{idx}, parked until daily reset...")
+            pool.mark_exhausted(idx)
+        return "quota", None
+    pool.record_error(idx, latency)
+    print(f"❌ API key #{idx} failed (start={start_index}): {response.status_code} -> {response.text[:160]}")
+    return "error", None
+
+
+def collect_items(items: list, collected: list, seen: set):
+    """Append non-Wikipedia results until TARGET_COUNT is reached."""
+    for item in items:
+        link = item.get("link")
+        if not link or link in seen:
+            continue
+        # Exclude Wikipedia domains (both en.wikipedia.org and other language subdomains)
+        try:
+            host = urlparse(link).hostname or ""
+        except Exception:
+            host = ""
+        if host.endswith("wikipedia.org"):
+            # Skip but do NOT count toward quota so we still attempt to fill TARGET_COUNT
+            continue
+        seen.add(link)
+        collected.append({
+            "title": item.get("title"),
+            "link": link,
+            "snippet": item.get("snippet"),
+            "favicon": get_favicon_url(link),
+            "published_date": pagemap_date(item),
+        })
+        if len(collected) >= TARGET_COUNT:
+            break
+
 
-    TARGET_COUNT = 10
+def fetch_search_results(query: str) -> list:
+    """Query Google CSE with automatic credential fallback and enrich the results.
 
-    credentials = load_env_credentials()
+    Keys are tried healthiest first (see services.credential_pool); keys parked
+    for quota are skipped. When recent searches usually needed a second page,
+    pages 1 and 2 are requested in parallel.
+    """
+    pool = get_credential_pool()
     collected = []
+    seen = set()
+    first_page_seen = False
 
-    for idx, cred in enumerate(credentials, start=1):
+    for idx, cred in pool.ordered():
         start_index = 1  # Google CSE start index (1-based)
+        prefetched = None
+        if pool.should_prefetch():
+            # Run in a copy of this context so the page's spans reach this request's Server-Timing
+            prefetched = _page_executor.submit(contextvars.copy_context().run, fetch_page, pool, idx, cred, query, 11)
         # We'll attempt up to 5 pages per credential (max 50 results) or until filled
         while len(collected) < TARGET_COUNT and start_index <= 50:
-            params = {
-                "key": cred["CSE_API_KEY"],
-                "cx": cred["CSE_ENGINE_ID"],
-                "q": query,
-                "start": start_index
-            }
-            try:
-                response = requests.get(GOOGLE_CSE_URL, params=params, timeout=10)
-            except requests.exceptions.RequestException as e:
-                print(f"⚠️ Network error for key #{idx} (start={start_index}): {e}")
-                break
-
-            if response.status_code == 200:
-                data = response.json()
-
-                # Store recent search once per successful credential
-                if user_id and start_index == 1:
-                    try:
-                        store_recent_search(user_id, query)
-                    except Exception as e:
-                        print(f"⚠️ Failed to store recent search for user {user_id}: {e}")
-
-                items = data.get("items", [])
-                if not items:
-                    # No more results in this credential
-                    break
-                for item in items:
-                    link = item.get("link")
-                    if not link:
-                        continue
-                    # Exclude Wikipedia domains (both en.wikipedia.org and other language subdomains)
-                    try:
-                        host = urlparse(link).hostname or ""
-                    except Exception:
-                        host = ""
-                    if host.endswith("wikipedia.org"):
-                        # Skip but do NOT count toward quota so we still attempt to fill TARGET_COUNT
-                        continue
-                    favicon = get_favicon_url(link)
-                    category = get_category_from_meta(link)
-                    collected.append({
-                        "title": item.get("title"),
-                        "link": link,
-                        "snippet": item.get("snippet"),
-                        "favicon": favicon,
-                        **category,
-                    })
-                    if len(collected) >= TARGET_COUNT:
-                        break
-
-                # Advance to next page (Google CSE returns up to 10 results per page)
-                start_index += 10
-            elif response.status_code == 403 and "quota" in response.text.lower():
-                print(f"🚫 Quota exceeded for API key #{idx}, switching to next credential...")
-                break
+            if start_index == 11 and prefetched is not None:
+                outcome, items = prefetched.result()
             else:
-                print(f"❌ API key #{idx} failed (start={start_index}): {response.status_code} -> {response.text[:160]}")
+                outcome, items = fetch_page(pool, idx, cred, query, start_index)
+            if outcome != "ok" or not items:
+                # Switch credential on failure; stop paging when results run out
                 break
+            collect_items(items, collected, seen)
+            if start_index == 1 and not first_page_seen:
+                first_page_seen = True
+                pool.record_second_page(len(collected) < TARGET_COUNT)
+
+            # Advance to next page (Google CSE returns up to 10 results per page)
+            start_index += 10
 
         if len(collected) >= TARGET_COUNT:
             break
 
-    if not collected:
+    # Site metadata is fetched concurrently, bounded by an overall deadline
+    with metrics.span("enrich"):
+        return enrich_results(collected[:TARGET_COUNT])
+
+
+def search_google(request):
+    """Search a keyword using Google Custom Search API with automatic fallback + Firebase.
+
+    Returns up to 10 search results excluding Wikipedia domains. Repeated queries
+    are served from the query cache (see services.search_cache).
+    """
+    query = getattr(request, "query", "").strip()
+    user_id = getattr(request, "user_id", None)
+    if not query:
+        return {"status_code": 400, "detail": "Query cannot be empty."}
+
+    results = cached_search(query, fetch_search_results)
+    if not results:
         return {"status_code": 429, "detail": "All Google API keys exhausted or no results."}
 
-    return {"query": query, "results": collected[:TARGET_COUNT]}
+    # Store recent search once per successful search
+    if user_id:
+        try:
+            store_recent_search(user_id, query)
+        except Exception as e:
+            print(f"⚠️ Failed to store recent search for user {user_id}: {e}")
+
+    # Lookups that were still pending when the entry was cached may have finished since
+    return {"query": query, "results": resolve_pending(results)}
@@ -0,0 +1,318 @@
+import asyncio
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from utils import metrics
+
+try:
+    import resource
+except ImportError:  # Windows: no per-job CPU limit
+    resource = None
+
+# Serverless platforms freeze or cap the process between requests; parse in-thread there
+SERVERLESS_ENV_VARS = ("AWS_LAMBDA_FUNCTION_NAME", "FUNCTION_TARGET", "K_SERVICE", "VERCEL")
+_serverless = any(os.getenv(name) for name in SERVERLESS_ENV_VARS)
+# Parsing and section extraction are pure CPU; run them in worker processes so
+# big pages do not hold the server's GIL. PARSE_WORKERS=0 parses in-thread instead.
+# Every app process (uvicorn/gunicorn worker) gets its own pool, so keep the default small.
+WORKERS = int(os.getenv("PARSE_WORKERS", "0" if _serverless else str(min(2, os.cpu_count() or 1))))
+# Recycle each worker after this many jobs (bounds leaks/fragmentation from huge pages)
+MAX_TASKS_PER_CHILD = int(os.getenv("PARSE_MAX_TASKS_PER_CHILD", "200"))
+# CPU seconds one page may take before the job is abandoned
+CPU_LIMIT_SECONDS = int(os.getenv("PARSE_CPU_LIMIT", "10"))
+
+_pool = None
+_pool_lock = threading.Lock()
+_disabled = None  # why worker processes cannot be started here (then parsing stays in-thread)
+_counters = {"jobs": 0, "cpu_limit_exceeded": 0, "pool_restarts": 0, "inline": 0}
+# Streamed jobs send each event back as soon as the worker yields it, over one queue
+# shared by all workers; a dispatcher thread routes events to the waiting request.
+_events = None
+_job_ids = itertools.count(1)
+_subscribers = {}  # job id -> queue.Queue of that job's encoded events (None = end)
+_subscribers_lock = threading.Lock()
+# How often a streamed request checks that its worker is still alive while waiting
+EVENT_POLL_SECONDS = 0.5
+
+
+class CpuLimitExceeded(Exception):
+    pass
+
+
+def _on_sigxcpu(signum, frame):
+    raise CpuLimitExceeded()
+
+
+def _init_worker(events):
+    global _events
+    _events = events
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _on_sigxcpu)
+
+
+def _cpu_used() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _set_cpu_soft_limit(seconds):
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        seconds = min(seconds, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (seconds, hard))
+
+
+def _run_job(kind: str, html: str, url: str, job_id: int = None) -> bytes:
+    """Worker side: parse and return {"result", "timings"} as compact JSON bytes.
+
+    For "events" jobs each event is instead put on the shared event queue as
+    (job_id, event), followed by (job_id, None), and "result" is empty.
+    """
+    from services.scrape_a_link import iter_page_events, parse_page
+
+    limited = resource is not None and CPU_LIMIT_SECONDS > 0
+    if limited:
+        # RLIMIT_CPU counts the whole process, so the limit is "used so far + budget"
+        _set_cpu_soft_limit(math.ceil(_cpu_used()) + CPU_LIMIT_SECONDS)
+    result = None
+    try:
+        # The worker's spans travel back with the result and are replayed into the request
+        with metrics.recording() as timings:
+            if kind == "events":
+                for event in iter_page_events(html, url):
+                    _events.put((job_id, _encode(event)))
+            else:
+                result = parse_page(html, url)
+    except CpuLimitExceeded:
+        error = {"status_code": 500, "error": f"Parsing exceeded the {CPU_LIMIT_SECONDS}s CPU limit", "cpu_limit": True}
+        if kind == "events":
+            _events.put((job_id, _encode({"type": "error", **error})))
+        else:
+            result = error
+    finally:
+        if limited:
+            _set_cpu_soft_limit(resource.RLIM_INFINITY)
+        if kind == "events":
+            _events.put((job_id, None))
+    return _encode({"result": result, "timings": timings})
+
+
+def _encode(payload) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def _dispatch(events):
+    """Parent side: route streamed events from the workers to their requests."""
+    while True:
+        item = events.get()
+        if item is None:  # the pool was replaced
+            return
+        job_id, blob = item
+        with _subscribers_lock:
+            subscriber = _subscribers.get(job_id)
+        if subscriber is not None:  # else the request went away
+            subscriber.put(blob)
+
+
+def get_pool():
+    """Shared worker pool, or None when parsing runs in-thread."""
+    global _pool, _events
+    if WORKERS <= 0 or _disabled:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None and not _disabled:
+                try:
+                    # spawn: workers do not inherit the server's threads, sockets or locks
+                    context = multiprocessing.get_context("spawn")
+                    events = context.Queue()
+                    pool = ProcessPoolExecutor(
+                        max_workers=WORKERS,
+                        mp_context=context,
+                        initializer=_init_worker,
+                        initargs=(events,),
+                        max_tasks_per_child=MAX_TASKS_PER_CHILD or None,
+                    )
+                except (OSError, ImportError) as e:  # e.g. no /dev/shm or no _multiprocessing
+                    _disable(e)
+                    return None
+                _events = events
+                threading.Thread(target=_dispatch, args=(_events,), name="parse-events", daemon=True).start()
+                _pool = pool
+                print(f"✅ Parse pool started with {WORKERS} worker process(es)")
+    return _pool
+
+
+def _disable(error):
+    """Parse in-thread from now on: this host cannot run worker processes."""
+    global _disabled
+    _disabled = f"{type(error).__name__}: {error}"
+    print(f"⚠️ Parse pool unavailable ({_disabled}); parsing in-thread")
+
+
+def _submit(*args):
+    """Submit a job to the pool: (pool, future), or (None, None) to parse in-thread.
+
+    Submitting may start worker processes, so async callers run this in a thread.
+    """
+    pool = get_pool()
+    if pool is None:
+        return None, None
+    try:
+        future = pool.submit(_run_job, *args)
+    except BrokenProcessPool:
+        print("⚠️ Parse pool was broken; restarting it")
+        _reset_pool(pool)
+        return None, None
+    except (OSError, ImportError) as e:  # starting a worker failed (e.g. process limit)
+        _disable(e)
+        _reset_pool(pool)
+        return None, None
+    _counters["jobs"] += 1
+    return pool, future
+
+
+def _reset_pool(broken):
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+            _counters["pool_restarts"] += 1
+            _events.put(None)  # stop its dispatcher
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _decode(blob: bytes):
+    payload = json.loads(blob)
+    metrics.replay(payload["timings"])
+    result = payload["result"]
+    if result.pop("cpu_limit", False):  # internal flag; clients get {status_code, error}
+        _counters["cpu_limit_exceeded"] += 1
+    return result
+
+
+def _inline(kind: str, html: str, url: str):
+    from services.scrape_a_link import iter_page_events, parse_page
+    _counters["inline"] += 1
+    # In-thread events stay a generator, so sections still stream as they complete
+    return iter_page_events(html, url) if kind == "events" else parse_page(html, url)
+
+
+def _run(kind: str, html: str, url: str):
+    pool, future = _submit(kind, html, url)
+    if future is None:
+        return _inline(kind, html, url)
+    try:
+        with metrics.span("parse_pool"):  # queueing + transfer + the worker's own spans
+            blob = future.result()
+        return _decode(blob)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed at the hard CPU limit); start a fresh pool for later jobs
+        print(f"⚠️ Parse pool broke while parsing {url}; restarting it")
+        _reset_pool(pool)
+        return _inline(kind, html, url)
+
+
+async def _run_async(kind: str, html: str, url: str):
+    # Off the event loop: creating the pool or (re)starting a worker takes a while
+    pool, future = await asyncio.to_thread(_submit, kind, html, url)
+    if future is None:
+        return await asyncio.to_thread(_inline, kind, html, url)
+    try:
+        with metrics.span("parse_pool"):
+            blob = await asyncio.wrap_future(future)
+        return _decode(blob)
+    except BrokenProcessPool:
+        print(f"⚠️ Parse pool broke while parsing {url}; restarting it")
+        _reset_pool(pool)
+        return await asyncio.to_thread(_inline, kind, html, url)
+
+
+def parse_page_pooled(html: str, url: str) -> dict:
+    """parse_page in a worker process (blocks the calling thread, not the GIL)."""
+    return _run("page", html, url)
+
+
+async def parse_page_async(html: str, url: str) -> dict:
+    return await _run_async("page", html, url)
+
+
+def page_events_pooled(html: str, url: str):
+    """iter_page_events in a worker process; each event is yielded as soon as the worker produces it."""
+    job_id = next(_job_ids)
+    received = queue.Queue()
+    with _subscribers_lock:
+        _subscribers[job_id] = received  # before submitting, so no event is missed
+    pool, future = _submit("events", html, url, job_id)
+    if future is None:
+        with _subscribers_lock:
+            _subscribers.pop(job_id, None)
+        yield from _inline("events", html, url)
+        return
+    sent = 0
+    try:
+        with metrics.span("parse_pool"):
+            while True:
+                try:
+                    blob = received.get(timeout=EVENT_POLL_SECONDS)
+                except queue.Empty:
+                    if future.done() and future.exception() is not None:
+                        future.result()  # the worker died before finishing the stream
+                    continue
+                if blob is None:
+                    break
+                event = json.loads(blob)
+                if event.pop("cpu_limit", False):
+                    _counters["cpu_limit_exceeded"] += 1
+                sent += 1
+                yield event
+            metrics.replay(json.loads(future.result())["timings"])
+    except BrokenProcessPool:
+        print(f"⚠️ Parse pool broke while parsing {url}; restarting it")
+        _reset_pool(pool)
+        if sent:
+            yield {"type": "error", "status_code": 500, "error": "Parsing failed"}
+        else:
+            yield from _inline("events", html, url)
+    finally:
+        with _subscribers_lock:
+            _subscribers.pop(job_id, None)
+
+
+def _warm_worker() -> int:
+    from utils.html_parser import warm_up
+    import services.scrape_a_link  # noqa: F401 (the module every job imports)
+    warm_up()
+    return os.getpid()
+
+
+def warm_up_parse_pool() -> int:
+    """Start the workers and load the parser in each; returns how many answered."""
+    pool = get_pool()
+    if pool is None:
+        return 0
+    # Workers start on demand, so one job per worker submitted together starts all of them
+    try:
+        futures = [pool.submit(_warm_worker) for _ in range(WORKERS)]
+    except (OSError, ImportError) as e:
+        _disable(e)
+        _reset_pool(pool)
+        return 0
+    return len({f.result() for f in futures})
+
+
+def parse_pool_stats() -> dict:
+    return {"workers": WORKERS, "disabled": _disabled, "max_tasks_per_child": MAX_TASKS_PER_CHILD,
+            "cpu_limit_seconds": CPU_LIMIT_SECONDS, **_counters}
+
+
+def shutdown_parse_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,114 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+from services.category_finder import get_category_from_meta
+from utils import metrics
+from utils.domain_cache import get_domain_category, store_domain_category
+
+# Fan-out limits (override via environment variables)
+MAX_WORKERS = int(os.getenv("ENRICH_MAX_WORKERS", "16"))
+PER_HOST_LIMIT = int(os.getenv("ENRICH_PER_HOST_LIMIT", "2"))
+DEADLINE_SECONDS = float(os.getenv("ENRICH_DEADLINE_SECONDS", "3.0"))
+
+# Long-lived pool: lookups still running at the deadline finish in the background
+# instead of blocking the response.
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="enrich")
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+
+def _host_of(link: str) -> str:
+    domain = urlparse(link).netloc
+    if domain.startswith("www."):
+        domain = domain[4:]
+    return domain
+
+
+def _host_semaphore(host: str):
+    with _host_slots_lock:
+        sem = _host_slots.get(host)
+        if sem is None:
+            sem = threading.BoundedSemaphore(PER_HOST_LIMIT)
+            _host_slots[host] = sem
+        return sem
+
+
+def _fetch_category(link: str, host: str, wait_timeout: float):
+    """Run get_category_from_meta while holding one of the host's slots."""
+    sem = _host_semaphore(host)
+    if not sem.acquire(timeout=max(wait_timeout, 0)):
+        return None
+    try:
+        # Enrichment threads have no request context: this span only feeds /metrics
+        with metrics.span("category"):
+            category = get_category_from_meta(link)
+    finally:
+        sem.release()
+    if category.get("category") != "Unknown":
+        store_domain_category(host, category["category"], category["site"])
+    return category
+
+
+def pending_category(link: str, published_date: str = None) -> dict:
+    """Placeholder returned for results whose lookup missed the deadline."""
+    return {"site": _host_of(link), "category": "Pending", "published_date": published_date}
+
+
+def enrich_results(results: list, deadline: float = None) -> list:
+    """Attach site/category/published_date to each result concurrently.
+
+    Domains classified recently are answered from the domain cache; the rest
+    get one lookup per domain (on its first link), run on a bounded thread
+    pool with at most PER_HOST_LIMIT in flight per host. Anything not
+    finished after `deadline` seconds is marked `category: "Pending"` so one
+    slow site cannot hold up the whole response.
+
+    A result keeps the published_date it arrived with (from the CSE pagemap);
+    the fetched link also gets the date from its own meta tags.
+    """
+    if deadline is None:
+        deadline = DEADLINE_SECONDS
+    categories = {}
+    unknown_hosts = {}
+    for i, result in enumerate(results):
+        host = _host_of(result["link"])
+        entry = get_domain_category(host)
+        if entry:
+            categories[i] = {"site": entry["site"], "category": entry["category"],
+                             "published_date": result.get("published_date")}
+            continue
+        unknown_hosts.setdefault(host, []).append(i)
+
+    futures = {
+        _executor.submit(_fetch_category, results[indexes[0]]["link"], host, deadline): indexes
+        for host, indexes in unknown_hosts.items()
+    }
+    done, not_done = wait(futures, timeout=deadline)
+    if not_done:
+        print(f"⏱️ {len(not_done)} metadata lookups still pending after {deadline}s")
+
+    for fut, indexes in futures.items():
+        # None: the lookup could not get a host slot before the deadline
+        category = fut.result() if fut in done else None
+        for i in indexes:
+            date = results[i].get("published_date")
+            if category is None:
+                categories[i] = pending_category(results[i]["link"], date)
+            elif i == indexes[0]:
+                categories[i] = {**category, "published_date": category.get("published_date") or date}
+            else:
+                categories[i] = {**category, "published_date": date}
+    return [{**result, **categories[i]} for i, result in enumerate(results)]
+
+
+def resolve_pending(results: list) -> list:
+    """Fill "Pending" categories from the domain cache without any network calls."""
+    resolved = []
+    for result in results:
+        if result.get("category") == "Pending":
+            entry = get_domain_category(_host_of(result["link"]))
+            if entry:
+                result = {**result, "site": entry["site"], "category": entry["category"]}
+        resolved.append(result)
+    return resolved
@@ -1,8 +1,26 @@
-import requests
-from bs4 import BeautifulSoup, NavigableString, Tag
+import httpx
 from urllib.parse import urlparse, urljoin
 import uuid
 import re
+import time
+from utils import http_client, metrics
+from services.parse_pool import parse_page_pooled
+from utils.html_parser import make_soup
+
+# Subtrees that never carry article content; the walk prunes them entirely
+SKIP_TAGS = frozenset({"script", "style", "nav", "footer", "header", "form", "noscript", "svg", "iframe", "button"})
+HEADING_TAGS = frozenset({"h1", "h2", "h3", "h4", "h5", "h6"})
+
+REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate",
+    "Upgrade-Insecure-Requests": "1"
+}
+
+DATE_META_KEYS = [("property", "article:published_time"), ("name", "pubdate"), ("name", "date"), ("itemprop", "datePublished")]
+AUTHOR_META_KEYS = [("name", "author"), ("property", "article:author"), ("name", "dc.creator"), ("name", "byl")]
 
 def clean_text(text: str) -> str:
     """Clean and normalize text."""
@@ -24,6 +42,109 @@ def is_valid_text(text: str) -> bool:
         return False
     return True
 
+def new_id(length: int = 8) -> str:
+    return str(uuid.uuid4())[:length]
+
+
+class ContentCollector:
+    """Accumulates deduplicated paragraphs, images and links for one section."""
+
+    __slots__ = ("url", "paragraphs", "images", "links", "last_para",
+                 "seen_paragraphs", "seen_images", "seen_links", "_extracted")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.paragraphs, self.images, self.links = [], [], []
+        self.last_para = None
+        self.seen_paragraphs = set()  # normalized paragraph text
+        self.seen_images = set()      # (src, alt)
+        self.seen_links = set()       # (href, text)
+        self._extracted = None
+
+    def add_para(self, text: str):
+        # Always collect paragraph-ish content; light filtering only
+        if not is_valid_text(text):
+            return
+        norm = text.lower()
+        if norm != self.last_para and norm not in self.seen_paragraphs:
+            self.paragraphs.append(text)
+            self.last_para = norm
+            self.seen_paragraphs.add(norm)
+
+    def add_image(self, src: str, alt: str, caption: str):
+        key = (src, alt.strip().lower())
+        if key not in self.seen_images:
+            self.images.append({'src': src, 'alt': alt, 'caption': caption})
+            self.seen_images.add(key)
+
+    def add_link(self, href: str, text: str):
+        key = (href, text.lower())
+        if key not in self.seen_links:
+            self.links.append({'href': href, 'text': text})
+            self.seen_links.add(key)
+
+    def is_empty(self) -> bool:
+        return not (self.paragraphs or self.images or self.links)
+
+    def extracted(self) -> dict:
+        """{content, images, links}; computed once and shared by sections and outline."""
+        if self._extracted is None:
+            self._extracted = {
+                'content': '\n\n'.join(self.paragraphs),
+                'images': self.images,
+                'links': self.links
+            }
+        return self._extracted
+
+
+def iter_walk(root, collector: ContentCollector, on_heading=None):
+    """Single pre-order walk over `root` that routes content into collectors.
+
+    Content goes to `collector` until the first heading. Skipped tags are pruned
+    with their whole subtree. When `on_heading(level, text)` is given it is called
+    for each non-empty heading and returns the collector for the content that
+    follows (the generator yields right after, so callers can act on section
+    boundaries); otherwise headings are kept as paragraphs.
+    """
+    from bs4 import Tag  # bs4 loads with the first parse (see utils.html_parser)
+
+    url = collector.url
+    target = collector
+    pending = [root]
+    while pending:
+        node = pending.pop()
+        if not isinstance(node, Tag):
+            continue
+        name = node.name.lower() if node.name else ''
+        if not name or name in SKIP_TAGS:
+            continue
+        if name in HEADING_TAGS:
+            heading_text = clean_text(node.get_text())
+            if heading_text:
+                if on_heading is not None:
+                    target = on_heading(int(name[1]), heading_text)
+                    yield
+                elif len(heading_text) > 2:
+                    target.add_para(heading_text)
+                continue
+        elif name == 'img':
+            if node.get('src'):
+                target.add_image(urljoin(url, node.get('src')), node.get('alt', ''), node.get('title', ''))
+            continue
+        elif name == 'a':
+            if node.get('href'):
+                ltxt = clean_text(node.get_text(' '))
+                if is_valid_text(ltxt):
+                    target.add_link(urljoin(url, node.get('href')), ltxt)
+        elif name in ('p', 'li'):
+            target.add_para(clean_text(node.get_text(' ')))
+        # Children are pushed reversed so they pop in document order
+        pending.extend(reversed(node.contents))
+
+def walk_content(root, collector: ContentCollector, on_heading=None):
+    for _ in iter_walk(root, collector, on_heading):
+        pass
+
 def extract_content(elements, url):
     """Extract grouped textual content plus media/links from given elements.
 
@@ -32,338 +153,300 @@ def extract_content(elements, url):
       images: list[{src, alt, caption}]
       links: list[{href, text}]
     """
-    SKIP_TAGS = {"script", "style", "nav", "footer", "header", "form", "noscript", "svg", "iframe", "button"}
-    paragraphs, images, links = [], [], []
-    last_para = None
-    seen_paragraphs = set()  # normalized paragraph text
-    seen_images = set()      # (src, alt)
-    seen_links = set()       # (href, text)
-
-    def add_para(text: str):
-        nonlocal last_para
-        if not text:
-            return
-        # Always collect paragraph-ish content; light filtering only
-        if is_valid_text(text):
-            norm = text.lower()
-            if norm != last_para and norm not in seen_paragraphs:
-                paragraphs.append(text)
-                last_para = norm
-                seen_paragraphs.add(norm)
-
-    for root in elements:
-        if not getattr(root, 'name', None):
-            continue
-        for node in root.descendants:
-            if isinstance(node, NavigableString):
-                continue
-            name = getattr(node, 'name', '').lower()
-            if not name or name in SKIP_TAGS:
-                continue
-            if name == 'img' and node.get('src'):
-                src_abs = urljoin(url, node.get('src'))
-                alt_txt = node.get('alt', '')
-                key = (src_abs, alt_txt.strip().lower())
-                if key not in seen_images:
-                    images.append({
-                        'src': src_abs,
-                        'alt': alt_txt,
-                        'caption': node.get('title', '')
-                    })
-                    seen_images.add(key)
-                continue
-            if name == 'a' and node.get('href'):
-                ltxt = clean_text(node.get_text(' '))
-                if is_valid_text(ltxt):
-                    href_abs = urljoin(url, node.get('href'))
-                    key = (href_abs, ltxt.lower())
-                    if key not in seen_links:
-                        links.append({'href': href_abs, 'text': ltxt})
-                        seen_links.add(key)
-                continue
-            if name in {'p','li'}:
-                add_para(clean_text(node.get_text(' ')))
-                continue
-            if name in {'ul','ol'}:
-                for li in node.find_all('li', recursive=False):
-                    add_para(clean_text(li.get_text(' ')))
-                continue
-            if name in {'h1','h2','h3','h4','h5','h6'}:
-                heading_text = clean_text(node.get_text(' '))
-                if heading_text and len(heading_text) > 2:
-                    add_para(heading_text)
+    with metrics.span("extract"):
+        collector = ContentCollector(url)
+        for root in elements:
+            if not getattr(root, 'name', None):
                 continue
+            walk_content(root, collector)
+        return collector.extracted()
+
+def iter_structure(main_content, url: str, title: str):
+    """Build `sections` (two-level, backward compatible) and the full `outline` in one walk.
 
+    Generic algorithm: on encountering hN, pop the stack until the top has level < N,
+    then push a new node. Content attaches to the current (deepest) heading node; if
+    no heading has been seen yet it becomes the preface.
+
+    Yields ("section", section) as soon as a top-level section is complete (the
+    Introduction just before the first one), then ("structure", (sections, outline)).
+    A section streamed early is dropped from the final list only if a shallower
+    top-level heading shows up later in the page.
+    """
+    roots = []
+    heading_stack = []
+    completed = []  # roots finished since the last yield
+    preface = ContentCollector(url)
+    intro = {}
+
+    def on_heading(level: int, heading_text: str):
+        while heading_stack and heading_stack[-1]['level'] >= level:
+            heading_stack.pop()
+        node = {
+            'id': new_id(),
+            'title': heading_text,
+            'level': level,
+            'collector': ContentCollector(url),
+            'children': []
+        }
+        if heading_stack:
+            heading_stack[-1]['children'].append(node)
+        else:
+            if roots:
+                completed.append(roots[-1])
+            roots.append(node)
+        heading_stack.append(node)
+        return node['collector']
+
+    def section_for(top):
+        if 'section' not in top:
+            section = {'id': top['id'], 'title': top['title'], 'subsections': []}
+            # If top has direct content before any child, create an Overview subsection
+            if not top['collector'].is_empty():
+                section['subsections'].append({'id': new_id(), 'title': 'Overview', **top['collector'].extracted()})
+            for child in top['children']:
+                # Use ONLY the child's direct content (no descendant aggregation) to avoid duplication.
+                if not child['collector'].is_empty():
+                    section['subsections'].append({'id': child['id'], 'title': child['title'], **child['collector'].extracted()})
+            top['section'] = section if section['subsections'] else None
+        return top['section']
+
+    def introduction():
+        # Introduction from preface (same ids whether streamed or not)
+        if not intro and not preface.is_empty():
+            intro.update({
+                'id': new_id(),
+                'title': 'Introduction',
+                'subsections': [{'id': new_id(), 'title': 'Overview', **preface.extracted()}]
+            })
+        return intro or None
+
+    def ready_sections(tops):
+        min_level = min(n['level'] for n in roots)
+        for top in tops:
+            section = section_for(top) if top['level'] == min_level else None
+            if section:
+                if not intro and introduction():
+                    yield "section", intro
+                yield "section", section
+
+    for _ in iter_walk(main_content, preface, on_heading=on_heading):
+        if completed:
+            yield from ready_sections(completed)
+            completed.clear()
+    if roots:
+        yield from ready_sections(roots[-1:])
+
+    sections = []
+    if roots:
+        min_level = min(n['level'] for n in roots)
+        sections = [section_for(n) for n in roots if n['level'] == min_level]
+        sections = [s for s in sections if s]
+    if sections and introduction():
+        sections.insert(0, intro)
+
+    # Fallback if no sections created: treat whole body as one section
+    if not sections:
+        # Without headings the preface already holds the whole body; otherwise re-walk once
+        body_extracted = preface.extracted() if not roots else extract_content([main_content], url)
+        if body_extracted['content'] or body_extracted['images'] or body_extracted['links']:
+            sections.append({
+                'id': new_id(),
+                'title': title,
+                'subsections': [{'id': new_id(), 'title': title, **body_extracted}]
+            })
+            yield "section", sections[0]
+
+    # Full hierarchical outline, sharing the content extracted above
+    def serialize_node(node):
+        node_content = node['collector'].extracted()
+        return {
+            'id': node['id'],
+            'title': node['title'],
+            'level': node['level'],
+            'content': node_content['content'],
+            'images': node_content['images'],
+            'links': node_content['links'],
+            'children': [serialize_node(c) for c in node['children']]
+        }
+    outline = [serialize_node(n) for n in roots]
+    yield "structure", (sections, outline)
+
+def build_structure(main_content, url: str, title: str):
+    """Return (sections, outline) for `main_content`."""
+    with metrics.span("sections"):
+        for kind, value in iter_structure(main_content, url, title):
+            if kind == "structure":
+                return value
+
+def extract_metadata(soup):
+    """Return (title, publish_date, author) from one pass over the page's meta tags."""
+    title = soup.title.string if soup.title else "Untitled"
+
+    meta = {}
+    for tag in soup.find_all("meta"):
+        content = tag.get("content")
+        if not content:
+            continue
+        for attr in ("property", "name", "itemprop"):
+            value = tag.get(attr)
+            if value:
+                meta.setdefault((attr, value), content)
+
+    # Attempt to extract publish date & author from meta tags
+    publish_date = next((meta[k] for k in DATE_META_KEYS if k in meta), None)
+    if not publish_date:
+        tag = soup.find("time", attrs={"itemprop": "datePublished"})
+        if tag:
+            publish_date = tag.get('content') or clean_text(tag.get_text()) or None
+    author = next((meta[k] for k in AUTHOR_META_KEYS if k in meta), None)
+    if not author:
+        # fallback: look for class patterns
+        author_candidate = soup.find(class_=re.compile(r"author|byline", re.I))
+        if author_candidate:
+            author_text = clean_text(author_candidate.get_text())
+            if 3 < len(author_text) < 120:
+                author = author_text
+    if not author:
+        author = "Unknown Author"
+    return title, publish_date, author
+
+def find_main_content(soup):
+    # Try Wikipedia-specific selectors first, then general selectors
+    return (soup.select_one(".mw-parser-output") or
+            soup.select_one("#mw-content-text") or
+            soup.select_one(".mw-body-content") or
+            soup.select_one("main") or
+            soup.select_one("article") or
+            soup.body)
+
+def page_metadata(soup, main_content, url: str) -> dict:
+    """The /content header fields, available before the section walk starts."""
+    title, publish_date, author = extract_metadata(soup)
+    domain = urlparse(url).netloc
     return {
-        'content': '\n\n'.join(paragraphs),
-        'images': images,
-        'links': links
+        "id": new_id(10),
+        "url": url,
+        "title": title,
+        "domain": domain,
+        "favicon": f"https://www.google.com/s2/favicons?sz=64&domain_url=https://{domain}",
+        "publishDate": publish_date,
+        "readTime": f"{max(1,len(main_content.get_text().split())//200)} min read",
+        "author": author,
     }
 
-def scrape_website(url: str):
-    try:
-        # Add timeout and better headers
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Accept-Encoding": "gzip, deflate",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1"
-        }
-        print(f"Scraping URL: {url}")
-        r = requests.get(url, headers=headers, timeout=30, allow_redirects=True)
-        r.raise_for_status()
-        print(f"Successfully fetched {len(r.content)} bytes")
-        soup = BeautifulSoup(r.text, "html.parser")
-
-        title = soup.title.string if soup.title else "Untitled"
-        domain = urlparse(url).netloc
-        favicon = f"https://www.google.com/s2/favicons?sz=64&domain_url=https://{domain}"
-
-        # Attempt to extract publish date & author from meta tags
-        publish_date = None
-        author = None
-        date_meta_selectors = [
-            ("meta", {"property": "article:published_time"}),
-            ("meta", {"name": "pubdate"}),
-            ("meta", {"name": "date"}),
-            ("meta", {"itemprop": "datePublished"}),
-            ("time", {"itemprop": "datePublished"})
-        ]
-        for tag_name, attrs in date_meta_selectors:
-            tag = soup.find(tag_name, attrs=attrs)
-            if tag:
-                publish_date = tag.get('content') or clean_text(tag.get_text())
-                if publish_date:
-                    break
-        author_meta_selectors = [
-            ("meta", {"name": "author"}),
-            ("meta", {"property": "article:author"}),
-            ("meta", {"name": "dc.creator"}),
-            ("meta", {"name": "byl"})
-        ]
-        for tag_name, attrs in author_meta_selectors:
-            tag = soup.find(tag_name, attrs=attrs)
-            if tag:
-                author = tag.get('content') or clean_text(tag.get_text())
-                if author:
-                    break
-        if not author:
-            # fallback: look for class patterns
-            author_candidate = soup.find(class_=re.compile(r"author|byline", re.I))
-            if author_candidate:
-                author_text = clean_text(author_candidate.get_text())
-                if 3 < len(author_text) < 120:
-                    author = author_text
-        if not author:
-            author = "Unknown Author"
-
-        # Try Wikipedia-specific selectors first, then general selectors
-        main_content = (soup.select_one(".mw-parser-output") or 
-                       soup.select_one("#mw-content-text") or 
-                       soup.select_one(".mw-body-content") or 
-                       soup.select_one("main") or 
-                       soup.select_one("article") or 
-                       soup.body)
+def parse_page(html: str, url: str, backend: str = None):
+    """Turn downloaded HTML into the /content payload (pure CPU, no network)."""
+    with metrics.span("parse"):
+        soup = make_soup(html, backend)
+    with metrics.span("metadata"):
+        main_content = find_main_content(soup)
         if not main_content:
             return {"status_code": 404, "error": "No main content found."}
+        data = page_metadata(soup, main_content, url)
+    sections, outline = build_structure(main_content, url, data["title"])
+    data["sections"] = sections
+    data["outline"] = outline  # full multi-level hierarchy
+    return {"status_code": 200, "data": data}
 
-        # ---------- Multi-Level Heading Stack Parser ----------
-        # Generic algorithm: on encountering heading hN, pop stack until top has level < N, then push new node.
-        # Non-heading content attaches to the current (deepest) heading node; if no heading yet, becomes preface.
+def iter_page_events(html: str, url: str, backend: str = None):
+    """Streaming variant of parse_page.
 
-        preface_elements = []
-        heading_stack = []  # stack of nodes
-        all_nodes = []      # flat list for later traversal (optional)
+    Yields {"type": "meta"} first, then one {"type": "section"} per completed
+    section, then {"type": "outline"} and finally {"type": "done"} listing the
+    ids of the final sections in order.
+    """
+    with metrics.span("parse"):
+        soup = make_soup(html, backend)
+    with metrics.span("metadata"):
+        main_content = find_main_content(soup)
+        data = page_metadata(soup, main_content, url) if main_content else None
+    if not main_content:
+        yield {"type": "error", "status_code": 404, "error": "No main content found."}
+        return
 
-        def new_heading_node(level: int, title: str):
-            return {
-                'id': str(uuid.uuid4())[:8],
-                'title': title,
-                'level': level,
-                'content_elements': [],  # raw bs4 elements (non heading) belonging directly to this heading
-                'children': []
-            }
+    yield {"type": "meta", "status_code": 200, "data": data}
+    # Time the walk only, not the consumer's handling of the events in between
+    elapsed, started = 0.0, time.perf_counter()
+    for kind, value in iter_structure(main_content, url, data["title"]):
+        elapsed += time.perf_counter() - started
+        if kind == "section":
+            yield {"type": "section", "section": value}
+        else:
+            metrics.observe("sections", elapsed)
+            sections, outline = value
+            yield {"type": "outline", "outline": outline}
+            yield {"type": "done", "status_code": 200, "sectionIds": [s["id"] for s in sections]}
+        started = time.perf_counter()
 
-        for el in main_content.descendants:  # traverse all descendants to catch nested headings
-            if not isinstance(el, Tag):
-                continue
-            if el.name is None:
-                continue
-            tag = el.name.lower()
-            # Skip script/style and nav/footer/header/forms to reduce noise
-            if tag in {"script", "style", "nav", "footer", "header", "form", "noscript", "svg", "iframe"}:
-                continue
-            if re.fullmatch(r'h[1-6]', tag):
-                level = int(tag[1])
-                heading_text = clean_text(el.get_text())
-                if not heading_text:
-                    continue
-                # Pop until stack top has smaller level
-                while heading_stack and heading_stack[-1]['level'] >= level:
-                    heading_stack.pop()
-                node = new_heading_node(level, heading_text)
-                if heading_stack:
-                    heading_stack[-1]['children'].append(node)
-                else:
-                    all_nodes.append(node)
-                heading_stack.append(node)
-            else:
-                # Content element
-                if heading_stack:
-                    heading_stack[-1]['content_elements'].append(el)
-                else:
-                    preface_elements.append(el)
-
-        # Helper to gather all descendant content under a node (including headings as textual markers)
-        def gather_descendant_elements(node, soup_ref):
-            elements = list(node['content_elements'])
-            for child in node['children']:
-                # create a synthetic heading tag to preserve hierarchy info inside content
-                h_tag = soup_ref.new_tag(f"h{child['level']}")
-                h_tag.string = child['title']
-                elements.append(h_tag)
-                elements.extend(gather_descendant_elements(child, soup_ref))
-            return elements
-
-        # Build sections/subsections (two-level) for backward compatibility
-        sections = []
-        if all_nodes:
-            min_level = min(n['level'] for n in all_nodes)
-            for top in [n for n in all_nodes if n['level'] == min_level]:
-                section = {
-                    'id': top['id'],
-                    'title': top['title'],
-                    'subsections': []
-                }
-                # If top has direct content before any child, create an Overview subsection
-                if top['content_elements']:
-                    top_content = extract_content(top['content_elements'], url)
-                    if top_content['content'] or top_content['images'] or top_content['links']:
-                        section['subsections'].append({
-                            'id': str(uuid.uuid4())[:8],
-                            'title': 'Overview',
-                            **top_content
-                        })
-                for child in top['children']:
-                    # Use ONLY the child's direct content elements (no descendant aggregation) to avoid duplication.
-                    child_content = extract_content(child['content_elements'], url)
-                    if child_content['content'] or child_content['images'] or child_content['links']:
-                        section['subsections'].append({
-                            'id': child['id'],
-                            'title': child['title'],
-                            **child_content
-                        })
-                if section['subsections']:
-                    sections.append(section)
-
-        # Introduction from preface
-        if sections and preface_elements:
-            intro_content = extract_content(preface_elements, url)
-            if intro_content['content'] or intro_content['images'] or intro_content['links']:
-                sections.insert(0, {
-                    'id': str(uuid.uuid4())[:8],
-                    'title': 'Introduction',
-                    'subsections': [{
-                        'id': str(uuid.uuid4())[:8],
-                        'title': 'Overview',
-                        **intro_content
-                    }]
-                })
-
-        # Fallback if no headings at all
-        if not sections:
-            body_content = extract_content([main_content], url)
-            if body_content['content'] or body_content['images'] or body_content['links']:
-                sections.append({
-                    'id': str(uuid.uuid4())[:8],
-                    'title': title,
-                    'subsections': [{
-                        'id': str(uuid.uuid4())[:8],
-                        'title': title,
-                        **body_content
-                    }]
-                })
-
-        # Provide full hierarchical outline as well
-        def serialize_node(node):
-            node_content = extract_content(node['content_elements'], url)
-            return {
-                'id': node['id'],
-                'title': node['title'],
-                'level': node['level'],
-                'content': node_content['content'],
-                'images': node_content['images'],
-                'links': node_content['links'],
-                'children': [serialize_node(c) for c in node['children']]
-            }
-        outline = [serialize_node(n) for n in all_nodes]
-
-        # Add preface content as Introduction if exists and at least one section
-        # Protect against duplicate Introduction insertion by checking existing titles
-        if sections and preface_elements:
-            existing_intro = next((s for s in sections if isinstance(s.get('title'), str) and s.get('title').strip().lower() == 'introduction'), None)
-            if not existing_intro:
-                intro_content = extract_content(preface_elements, url)
-                if intro_content['content'] or intro_content['images'] or intro_content['links']:
-                    sections.insert(0, {
-                        'id': str(uuid.uuid4())[:8],
-                        'title': 'Introduction',
-                        'subsections': [{
-                            'id': str(uuid.uuid4())[:8],
-                            'title': 'Overview',
-                            **intro_content
-                        }]
-                    })
-
-        # Fallback if no sections created: treat whole body as one section
-        if not sections:
-            body_content = extract_content([main_content], url)
-            if body_content['content'] or body_content['images']:
-                sections.append({
-                    'id': str(uuid.uuid4())[:8],
-                    'title': title,
-                    'subsections': [{
-                        'id': str(uuid.uuid4())[:8],
-                        'title': title,
-                        **body_content
-                    }]
-                })
+def conditional_headers(validators: dict = None) -> dict:
+    """REQUEST_HEADERS plus If-None-Match/If-Modified-Since from a cached response."""
+    headers = dict(REQUEST_HEADERS)
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
 
-        return {
-            "status_code": 200,
-            "data": {
-                "id": str(uuid.uuid4())[:10],
-                "url": url,
-                "title": title,
-                "domain": domain,
-                "favicon": favicon,
-                "publishDate": publish_date,
-                "readTime": f"{max(1,len(main_content.get_text().split())//200)} min read",
-                "author": author,
-                "sections": sections,
-                "outline": outline  # full multi-level hierarchy
-            }
-        }
+def response_validators(r) -> dict:
+    """Cache validators of a response; `no_store` when the origin forbids caching."""
+    return {
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+        "no_store": "no-store" in r.headers.get("Cache-Control", "").lower(),
+    }
+
+def _read_response(url: str, r):
+    if r.status_code == 304:
+        print(f"Not modified: {url}")
+        return None, response_validators(r)
+    r.raise_for_status()
+    print(f"Successfully fetched {len(r.content)} bytes")
+    return r.text, response_validators(r)
+
+def fetch_html_conditional(url: str, validators: dict = None):
+    """Return (html, validators); html is None when the origin answered 304 Not Modified."""
+    print(f"Scraping URL: {url}")
+    with metrics.span("fetch"):
+        r = http_client.request("GET", url, headers=conditional_headers(validators), timeout=30,
+                                extensions=metrics.http_trace("fetch"))
+        return _read_response(url, r)
 
-    except requests.exceptions.Timeout:
+async def fetch_html_conditional_async(url: str, validators: dict = None):
+    print(f"Scraping URL: {url}")
+    with metrics.span("fetch"):
+        r = await http_client.arequest("GET", url, headers=conditional_headers(validators), timeout=30,
+                                       extensions=metrics.http_trace_async("fetch"))
+        return _read_response(url, r)
+
+def fetch_html(url: str) -> str:
+    return fetch_html_conditional(url)[0]
+
+def error_response(url: str, e: Exception) -> dict:
+    """Map a fetch/parse exception to the /content error payload."""
+    if isinstance(e, httpx.TimeoutException):
         print(f"Timeout error for URL: {url}")
         return {"status_code": 408, "error": "Request timeout - the website took too long to respond"}
-    except requests.exceptions.ConnectionError:
+    if isinstance(e, httpx.NetworkError):
         print(f"Connection error for URL: {url}")
         return {"status_code": 502, "error": "Could not connect to the website"}
-    except requests.exceptions.HTTPError as e:
+    if isinstance(e, httpx.HTTPStatusError):
         print(f"HTTP error for URL: {url} - {e.response.status_code}")
         return {"status_code": e.response.status_code, "error": f"Website returned error: {e.response.status_code}"}
-    except requests.exceptions.RequestException as e:
+    if isinstance(e, httpx.HTTPError):
         print(f"Request error for URL: {url} - {str(e)}")
         return {"status_code": 500, "error": f"Network error: {str(e)}"}
+    print(f"Unexpected error for URL: {url} - {str(e)}")
+    import traceback
+    traceback.print_exc()
+    return {"status_code": 500, "error": f"Scraping failed: {str(e)}"}
+
+def scrape_website(url: str):
+    try:
+        return parse_page_pooled(fetch_html(url), url)
     except Exception as e:
-        print(f"Unexpected error for URL: {url} - {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return {"status_code": 500, "error": f"Scraping failed: {str(e)}"}
+        return error_response(url, e)
 
 # Example usage
 if __name__ == "__main__":
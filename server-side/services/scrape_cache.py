@@ -0,0 +1,301 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urldefrag
+from services.parse_pool import page_events_pooled, parse_page_async, parse_page_pooled
+from services.scrape_a_link import error_response, fetch_html_conditional, fetch_html_conditional_async
+from utils.disk_cache import DiskCache
+from utils.single_flight import SingleFlight
+from utils.ttl_cache import TTLCache
+
+# Parsed /content results with the origin's validators. Fresh for SCRAPE_CACHE_TTL
+# seconds, after which the next request revalidates with If-None-Match /
+# If-Modified-Since and reuses the parsed result on a 304. Entries are kept up
+# to SCRAPE_CACHE_MAX_AGE seconds for revalidation.
+TTL_SECONDS = float(os.getenv("SCRAPE_CACHE_TTL", "900"))
+MAX_AGE_SECONDS = float(os.getenv("SCRAPE_CACHE_MAX_AGE", str(24 * 3600)))
+MAX_ENTRIES = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "128"))
+# Optional compressed on-disk tier (empty = memory only)
+DISK_DIR = os.getenv("SCRAPE_CACHE_DIR", "")
+DISK_MAX_BYTES = int(os.getenv("SCRAPE_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024)))
+# Threads that run shared streamed scrapes (one per distinct URL in flight)
+STREAM_WORKERS = int(os.getenv("SCRAPE_STREAM_WORKERS", "16"))
+
+_memory = TTLCache(max_entries=MAX_ENTRIES, ttl=MAX_AGE_SECONDS)
+_disk = None
+_disk_lock = threading.Lock()
+_counters = {"fresh_hits": 0, "revalidated": 0, "not_modified": 0, "refetched": 0, "stale_on_error": 0}
+# Concurrent requests for the same URL share one fetch and parse
+_flight = SingleFlight()
+_stream_executor = ThreadPoolExecutor(max_workers=STREAM_WORKERS, thread_name_prefix="scrape-stream")
+_streams = {}  # key -> _Broadcast of the scrape in flight
+_streams_lock = threading.Lock()
+_stream_counters = {"stream_executions": 0, "stream_coalesced": 0}
+
+
+class _Broadcast:
+    """Events of one streamed scrape, replayed to every request that joins it."""
+
+    def __init__(self):
+        self.events = []
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def publish(self, event: dict):
+        with self.cond:
+            self.events.append(event)
+            self.cond.notify_all()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def __iter__(self):
+        index = 0
+        while True:
+            with self.cond:
+                while index >= len(self.events) and not self.closed:
+                    self.cond.wait()
+                if index >= len(self.events):
+                    return
+                event = self.events[index]
+            index += 1
+            yield event
+
+
+def normalize_url(url: str) -> str:
+    """Cache key: the URL without its #fragment."""
+    return urldefrag(url.strip())[0]
+
+
+def _get_disk():
+    global _disk
+    if _disk is None and DISK_DIR:
+        with _disk_lock:
+            if _disk is None:
+                _disk = DiskCache(DISK_DIR, DISK_MAX_BYTES)
+    return _disk
+
+
+def _lookup_disk(key: str):
+    """Disk-tier entry (decompressed and decoded), promoted to memory; None when missing or too old."""
+    entry = _disk.get(key)
+    if entry is not None:
+        if entry["fetched_at"] + MAX_AGE_SECONDS <= time.time():
+            _disk.delete(key)
+            return None
+        _memory.set(key, entry, stored_at=entry["fetched_at"])
+    return entry
+
+
+def _lookup(key: str):
+    """Entry {"result", "etag", "last_modified", "fetched_at"} from memory, else disk."""
+    entry = _memory.get(key)
+    if entry is None and _get_disk():
+        entry = _lookup_disk(key)
+    return entry
+
+
+def _is_fresh(entry: dict) -> bool:
+    return time.time() - entry["fetched_at"] < TTL_SECONDS
+
+
+def _store(key: str, result: dict, validators: dict):
+    if result.get("status_code") != 200 or validators.get("no_store"):
+        return None
+    entry = {
+        "result": result,
+        "etag": validators.get("etag"),
+        "last_modified": validators.get("last_modified"),
+        "fetched_at": time.time(),
+    }
+    _memory.set(key, entry)
+    if _get_disk():
+        _disk.set(key, entry)
+    return entry
+
+
+def _touch(key: str, entry: dict, validators: dict) -> dict:
+    """A 304 extends the cached result's freshness (and picks up refreshed validators)."""
+    _counters["not_modified"] += 1
+    refreshed = {**entry, "fetched_at": time.time(),
+                 "etag": validators.get("etag") or entry["etag"],
+                 "last_modified": validators.get("last_modified") or entry["last_modified"]}
+    _memory.set(key, refreshed)
+    if _get_disk():
+        _disk.set(key, refreshed)
+    return refreshed
+
+
+def _revalidate(url: str, key: str) -> dict:
+    entry = _lookup(key)
+    if entry is not None:
+        _counters["revalidated"] += 1
+    try:
+        html, validators = fetch_html_conditional(url, entry)
+        if html is None and entry is not None:
+            _touch(key, entry, validators)
+            return entry["result"]
+        _counters["refetched"] += 1
+        result = parse_page_pooled(html, url)
+        _store(key, result, validators)
+        return result
+    except Exception as e:
+        if entry is not None:
+            _counters["stale_on_error"] += 1
+            return entry["result"]
+        return error_response(url, e)
+
+
+async def _lookup_async(key: str):
+    """_lookup without blocking the event loop: only the disk tier runs on a thread."""
+    entry = _memory.get(key)
+    if entry is None and _get_disk():
+        entry = await asyncio.to_thread(_lookup_disk, key)
+    return entry
+
+
+async def _revalidate_async(url: str, key: str) -> dict:
+    entry = await _lookup_async(key)
+    if entry is not None:
+        _counters["revalidated"] += 1
+    try:
+        html, validators = await fetch_html_conditional_async(url, entry)
+        if html is None and entry is not None:
+            await asyncio.to_thread(_touch, key, entry, validators)
+            return entry["result"]
+        _counters["refetched"] += 1
+        result = await parse_page_async(html, url)
+        await asyncio.to_thread(_store, key, result, validators)
+        return result
+    except Exception as e:
+        if entry is not None:
+            # Serve the last good result rather than an error when the origin is down
+            _counters["stale_on_error"] += 1
+            return entry["result"]
+        return error_response(url, e)
+
+
+async def get_or_scrape_async(url: str) -> dict:
+    """Cached /content result for `url`; revalidated or scraped (once for concurrent callers) when not fresh."""
+    key = normalize_url(url)
+    entry = await _lookup_async(key)
+    if entry is not None and _is_fresh(entry):
+        _counters["fresh_hits"] += 1
+        return entry["result"]
+    return await _flight.ado(key, _revalidate_async, url, key)
+
+
+def get_or_scrape(url: str) -> dict:
+    """Blocking get_or_scrape_async, for worker threads (e.g. /content/batch)."""
+    key = normalize_url(url)
+    entry = _lookup(key)
+    if entry is not None and _is_fresh(entry):
+        _counters["fresh_hits"] += 1
+        return entry["result"]
+    return _flight.do(key, _revalidate, url, key)
+
+
+def _replay_events(result: dict):
+    data = result["data"]
+    meta = {k: v for k, v in data.items() if k not in ("sections", "outline")}
+    yield {"type": "meta", "status_code": 200, "data": meta}
+    for section in data["sections"]:
+        yield {"type": "section", "section": section}
+    yield {"type": "outline", "outline": data["outline"]}
+    yield {"type": "done", "status_code": 200, "sectionIds": [s["id"] for s in data["sections"]]}
+
+
+def _revalidate_events(url: str, key: str, entry):
+    """Stream events for a stale or missing entry, caching the assembled result."""
+    if entry is not None:
+        _counters["revalidated"] += 1
+    try:
+        html, validators = fetch_html_conditional(url, entry)
+    except Exception as e:
+        if entry is not None:
+            _counters["stale_on_error"] += 1
+            yield from _replay_events(entry["result"])
+        else:
+            yield {"type": "error", **error_response(url, e)}
+        return
+    if html is None and entry is not None:
+        _touch(key, entry, validators)
+        yield from _replay_events(entry["result"])
+        return
+
+    _counters["refetched"] += 1
+    data, sections = None, {}
+    for event in page_events_pooled(html, url):
+        if event["type"] == "meta":
+            data = dict(event["data"])
+        elif event["type"] == "section":
+            sections[event["section"]["id"]] = event["section"]
+        elif event["type"] == "outline" and data is not None:
+            data["outline"] = event["outline"]
+        elif event["type"] == "done" and data is not None:
+            data["sections"] = [sections[i] for i in event["sectionIds"]]
+            _store(key, {"status_code": 200, "data": data}, validators)
+        yield event
+
+
+def _produce_stream(url: str, key: str, entry, broadcast: _Broadcast):
+    """Run one streamed scrape for every joined request."""
+    try:
+        for event in _revalidate_events(url, key, entry):
+            broadcast.publish(event)
+    except Exception as e:
+        broadcast.publish({"type": "error", "status_code": 500, "error": f"Server error: {str(e)}"})
+    finally:
+        # Stored before unregistering, so later requests hit the cache instead
+        with _streams_lock:
+            _streams.pop(key, None)
+        broadcast.close()
+
+
+def iter_cached_scrape_events(url: str):
+    """/content stream events, replayed from the cache when fresh.
+
+    Stale entries are revalidated (a 304 replays the cached result) and misses
+    are scraped. Concurrent streams for the same URL share one scrape; requests
+    that join late first receive the events already produced.
+    """
+    key = normalize_url(url)
+    entry = _lookup(key)  # may read the disk tier, so before taking _streams_lock
+    if entry is None or not _is_fresh(entry):
+        # The scrape runs on its own thread, so a client disconnecting does not cut it short for the others
+        with _streams_lock:
+            broadcast = _streams.get(key)
+            if broadcast is None:
+                # A shared scrape may have finished meanwhile; it stores to memory, so only check there
+                entry = _memory.get(key) or entry
+                if entry is None or not _is_fresh(entry):
+                    broadcast = _streams[key] = _Broadcast()
+                    _stream_executor.submit(_produce_stream, url, key, entry, broadcast)
+                    _stream_counters["stream_executions"] += 1
+            else:
+                _stream_counters["stream_coalesced"] += 1
+        if broadcast is not None:
+            yield from broadcast
+            return
+
+    _counters["fresh_hits"] += 1
+    yield from _replay_events(entry["result"])
+
+
+def scrape_cache_stats() -> dict:
+    with _streams_lock:
+        streaming = len(_streams)
+    disk = _get_disk()
+    return {
+        **_memory.stats(),
+        **_counters,
+        "ttl": TTL_SECONDS,
+        "disk": disk.stats() if disk else None,
+        "single_flight": _flight.stats(),
+        **_stream_counters,
+        "streams_in_flight": streaming,
+    }
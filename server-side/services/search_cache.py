@@ -0,0 +1,75 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.single_flight import SingleFlight
+from utils.ttl_cache import TTLCache
+
+# Fresh for SEARCH_CACHE_TTL seconds, then served stale (and refreshed in the
+# background) for up to SEARCH_CACHE_STALE_TTL more seconds before it expires.
+TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL", "600"))
+STALE_SECONDS = float(os.getenv("SEARCH_CACHE_STALE_TTL", "3600"))
+MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "512"))
+
+_cache = TTLCache(max_entries=MAX_ENTRIES, ttl=TTL_SECONDS + STALE_SECONDS)
+_refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-refresh")
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+_counters = {"stale_hits": 0, "refreshes": 0, "refresh_failures": 0}
+# Concurrent misses for the same (normalized) query share one CSE fetch
+_flight = SingleFlight()
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive cache key."""
+    return " ".join(query.lower().split())
+
+
+def _refresh(key: str, query: str, fetch):
+    try:
+        results = fetch(query)
+        if results:
+            _cache.set(key, results)
+            _counters["refreshes"] += 1
+        else:
+            _counters["refresh_failures"] += 1
+    except Exception as e:
+        _counters["refresh_failures"] += 1
+        print(f"⚠️ Background refresh failed for '{query}': {e}")
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+
+def _fetch_and_store(key: str, query: str, fetch):
+    results = fetch(query)
+    if results:
+        _cache.set(key, results)
+    return results
+
+
+def cached_search(query: str, fetch):
+    """Return results for `query`, calling `fetch(query)` only on a miss.
+
+    Stale entries are returned immediately while a single background
+    refresh per key brings them up to date. Empty results are not cached.
+    Concurrent misses for the same key wait for a single fetch.
+    """
+    key = normalize_query(query)
+    found = _cache.get_with_age(key)
+    if found is None:
+        return _flight.do(key, _fetch_and_store, key, query, fetch)
+
+    results, age = found
+    if age >= TTL_SECONDS:
+        _counters["stale_hits"] += 1
+        with _refreshing_lock:
+            start = key not in _refreshing
+            _refreshing.add(key)
+        if start:
+            _refresher.submit(_refresh, key, query, fetch)
+    return results
+
+
+def search_cache_stats() -> dict:
+    return {**_cache.stats(), **_counters, "ttl": TTL_SECONDS, "stale_ttl": STALE_SECONDS,
+            "single_flight": _flight.stats()}
@@ -0,0 +1,238 @@
+import asyncio
+import hashlib
+import inspect
+import os
+import threading
+import time
+from utils import metrics
+from utils.single_flight import SingleFlight
+from utils.ttl_cache import TTLCache
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+# Alternative API endpoint, e.g. the local stand-in used by tools/load_test.py
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
+CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL", str(24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "2000"))
+# Long-document mode: chunk size for the map step and how many chunk calls run at once
+CHUNK_CHARS = int(os.getenv("SUMMARY_CHUNK_CHARS", "12000"))
+MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", "4"))
+
+_client = None
+_client_lock = threading.Lock()
+
+_cache = TTLCache(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL)
+_flight = SingleFlight()  # identical concurrent requests share one Gemini call
+_counters = {"generated": 0, "failures": 0}
+
+
+def get_client():
+    """Gemini client, created on first use: importing google.genai alone takes most of a second."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from google import genai
+                _client = genai.Client(api_key=GEMINI_API_KEY,
+                                       http_options={"base_url": GEMINI_BASE_URL} if GEMINI_BASE_URL else None)
+    return _client
+
+
+async def _aclient():
+    # The first call imports the SDK on a worker thread, not on the event loop
+    return _client if _client is not None else await asyncio.to_thread(get_client)
+
+
+def prompt_kind(summary_type: str) -> str:
+    """The prompt build_prompt actually uses: "section", or "detailed" for every other summary_type."""
+    return "section" if summary_type == "section" else "detailed"
+
+
+def build_prompt(text: str, summary_type: str) -> str:
+    if prompt_kind(summary_type) == "section":
+        # Map step of long-document mode: one chunk of a larger article
+        return ("Summarize this part of a longer article in 60-80 words. "
+                "Keep key facts, names and numbers:\n\n" + text)
+    # Example prompt styles
+    prompt_style = {
+        "concise": "Summarize in 80-100 words (plain, factual, concise):\n\n",
+        "detailed": f"Summarize with more context and details in 100 to 150 words:{text[:15000]}"
+    }
+    return prompt_style["detailed"]
+
+
+def summary_key(text: str, summary_type: str, model: str = MODEL) -> str:
+    """Content address of a summary: hash of (normalized text, summary_type, model)."""
+    normalized = " ".join(text.split())
+    digest = hashlib.sha256()
+    for part in (model, summary_type, normalized):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+async def _generate(key: str, text: str, summary_type: str) -> str:
+    try:
+        with metrics.span("gemini"):
+            client = await _aclient()
+            response = await client.aio.models.generate_content(
+                model=MODEL,
+                contents=build_prompt(text, summary_type)
+            )
+    except Exception:
+        _counters["failures"] += 1
+        raise
+    _counters["generated"] += 1
+    if response.text:
+        _cache.set(key, response.text)
+    return response.text
+
+
+async def summarize_text(text: str, summary_type: str = "concise") -> str:
+    """Summarize `text`, reusing cached summaries and coalescing identical in-flight calls."""
+    # Keyed by the prompt sent, so types that share one (e.g. "concise" and "detailed") share the entry
+    style = prompt_kind(summary_type)
+    key = summary_key(text, style)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    return await _flight.ado(key, _generate, key, text, style)
+
+
+def chunk_sections(sections: list) -> list:
+    """Pack (title, content) sections into chunks of at most CHUNK_CHARS.
+
+    Chunks break only at section boundaries, or at paragraph boundaries when a
+    single section is larger than a chunk.
+    """
+    chunks, current = [], ""
+    for title, content in sections:
+        content = (content or "").strip()
+        if not content:
+            continue
+        block = f"## {title}\n\n{content}" if title else content
+        paragraphs = [block] if len(block) <= CHUNK_CHARS else block.split("\n\n")
+        # A single oversized paragraph is cut into CHUNK_CHARS slices rather than dropped
+        pieces = (para[i:i + CHUNK_CHARS] for para in paragraphs for i in range(0, len(para), CHUNK_CHARS))
+        for piece in pieces:
+            if current and len(current) + len(piece) + 2 > CHUNK_CHARS:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+        # Start the next section in a fresh chunk once this one is reasonably full
+        if len(current) >= CHUNK_CHARS // 2:
+            chunks.append(current)
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def content_sections(data: dict, section_id: str | None = None):
+    """(title, content) pairs to summarize from a /content result.
+
+    Without `section_id` this is the whole article. Otherwise the id may be a
+    section, a subsection or an outline node (which includes its children).
+    Returns None when the id is not in this scrape.
+    """
+    sections = data.get("sections") or []
+    if not section_id:
+        return [(sub.get("title"), sub.get("content", "")) for s in sections for sub in s.get("subsections", [])]
+
+    for section in sections:
+        if section.get("id") == section_id:
+            return [(sub.get("title"), sub.get("content", "")) for sub in section.get("subsections", [])]
+        for sub in section.get("subsections", []):
+            if sub.get("id") == section_id:
+                return [(sub.get("title"), sub.get("content", ""))]
+
+    def flatten(node):
+        yield node.get("title"), node.get("content", "")
+        for child in node.get("children", []):
+            yield from flatten(child)
+
+    stack = list(data.get("outline") or [])
+    while stack:
+        node = stack.pop()
+        if node.get("id") == section_id:
+            return list(flatten(node))
+        stack.extend(node.get("children", []))
+    return None
+
+
+def merge_prompt(partials: list) -> str:
+    parts = "\n\n".join(f"Part {i}: {p}" for i, p in enumerate(partials, start=1))
+    return ("The following are summaries of consecutive parts of one article. Merge them into "
+            "a single coherent summary of 150-200 words (plain, factual, no part numbers):\n\n" + parts)
+
+
+async def _stream_generate(prompt: str):
+    client = await _aclient()
+    stream = client.aio.models.generate_content_stream(model=MODEL, contents=prompt)
+    if inspect.isawaitable(stream):  # newer SDKs return the iterator from a coroutine
+        stream = await stream
+    async for chunk in stream:
+        if chunk.text:
+            yield chunk.text
+
+
+async def iter_long_summary(sections: list):
+    """Map-reduce summary of a long document, streamed token by token.
+
+    `sections` is a list of (title, content). Chunks are summarized in parallel
+    (through summarize_text, so they are cached and coalesced too), then a
+    reduce call merges them and its output is streamed. Yields events:
+    {"type": "start", "chunks": n}, {"type": "token", "text": ...} and
+    {"type": "done", "summary": ...}, or {"type": "error", ...} when every chunk failed.
+    """
+    chunks = chunk_sections(sections)
+    yield {"type": "start", "chunks": len(chunks)}
+    if not chunks:
+        yield {"type": "done", "summary": ""}
+        return
+
+    key = summary_key("\n\n".join(chunks), "long")
+    cached = _cache.get(key)
+    if cached is not None:
+        yield {"type": "token", "text": cached}
+        yield {"type": "done", "summary": cached}
+        return
+
+    if len(chunks) == 1:
+        prompt = build_prompt(chunks[0], "detailed")
+    else:
+        limit = asyncio.Semaphore(MAP_CONCURRENCY)
+
+        async def map_chunk(chunk):
+            async with limit:
+                return await summarize_text(chunk, "section")
+
+        results = await asyncio.gather(*(map_chunk(c) for c in chunks), return_exceptions=True)
+        # A failed or empty chunk is left out of the merge rather than failing the whole summary
+        partials = [r for r in results if isinstance(r, str) and r.strip()]
+        if not partials:
+            errors = [r for r in results if isinstance(r, BaseException)]
+            reason = f": {errors[0]}" if errors else ""
+            yield {"type": "error", "error": f"Error generating summary: all {len(chunks)} chunk summaries failed{reason}"}
+            return
+        if len(partials) < len(chunks):
+            print(f"⚠️ Long summary: {len(chunks) - len(partials)} of {len(chunks)} chunk summaries failed, merging the rest")
+        prompt = merge_prompt(partials)
+
+    pieces = []
+    started = time.perf_counter()
+    async for piece in _stream_generate(prompt):
+        pieces.append(piece)
+        yield {"type": "token", "text": piece}
+    metrics.observe("gemini_stream", time.perf_counter() - started)
+    summary = "".join(pieces)
+    _counters["generated"] += 1
+    if summary:
+        _cache.set(key, summary)
+    yield {"type": "done", "summary": summary}
+
+
+def summary_cache_stats() -> dict:
+    flight = _flight.stats()
+    return {**_cache.stats(), **_counters, "coalesced": flight["coalesced"], "in_flight": flight["in_flight"]}
@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+
+# Heavy clients are created on first use (fast cold starts). WARMUP starts some of them
+# on a background thread at startup instead: "all" or a comma list of TARGETS (empty = none).
+# Leave it off where the platform freezes the process between requests. By default only the
+# parse pool starts here, so no request pays for spawning it (a no-op when PARSE_WORKERS=0).
+WARMUP = os.getenv("WARMUP", "parse_pool")
+
+_state = {"targets": [], "started_at": None, "finished_at": None, "results": {}}
+
+
+def _warm_genai():
+    from services.summarizer import get_client
+    get_client()
+
+
+def _warm_storage():
+    from utils.storage import get_backend
+    get_backend()
+
+
+def _warm_html():
+    from utils.html_parser import warm_up
+    warm_up()
+
+
+def _warm_parse_pool():
+    from services.parse_pool import warm_up_parse_pool
+    warm_up_parse_pool()
+
+
+TARGETS = {
+    "genai": _warm_genai,            # google.genai import + client
+    "storage": _warm_storage,        # storage backend (Firestore: credentials, firebase_admin, client)
+    "html": _warm_html,              # bs4 + parser backend, for in-process parsing
+    "parse_pool": _warm_parse_pool,  # parse worker processes, each with bs4 loaded
+}
+
+
+def selected_targets(value: str = None) -> list:
+    value = (WARMUP if value is None else value).strip().lower()
+    if value in ("", "0", "false", "no", "none"):
+        return []
+    if value in ("1", "true", "yes", "all"):
+        return list(TARGETS)
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in TARGETS]
+    if unknown:
+        print(f"⚠️ Ignoring unknown WARMUP target(s): {', '.join(unknown)}")
+    return [name for name in names if name in TARGETS]
+
+
+def _run(targets: list):
+    for name in targets:
+        started = time.perf_counter()
+        try:
+            TARGETS[name]()
+            _state["results"][name] = {"ok": True, "seconds": round(time.perf_counter() - started, 3)}
+        except Exception as e:
+            # A failed warm-up only costs the first request the same time it would have anyway
+            _state["results"][name] = {"ok": False, "seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+            print(f"⚠️ Warm-up of {name} failed: {e}")
+    _state["finished_at"] = time.time()
+    print(f"✅ Warm-up finished: {', '.join(targets)}")
+
+
+def start_warmup(value: str = None):
+    """Warm the selected targets on a daemon thread; requests are served meanwhile."""
+    targets = selected_targets(value)
+    if not targets:
+        return None
+    _state.update(targets=targets, started_at=time.time(), finished_at=None, results={})
+    thread = threading.Thread(target=_run, args=(targets,), name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def warmup_stats() -> dict:
+    """Selected targets and how long each took (seconds), once finished."""
+    return {**_state, "results": dict(_state["results"])}
@@ -0,0 +1,211 @@
+"""Offline benchmark of the scraping and classification hot paths over the checked-in corpus.
+
+Pages in fixtures/bench/ (see make_bench_corpus.py) are served by a local
+stand-in server (local_site.py) in a child process. For each page and stage it
+reports wall time over --repeat runs, and from one extra run under tracemalloc
+the peak memory, the memory and number of blocks still held by the stage's
+result, and the garbage collections it triggered (a proxy for allocation churn).
+
+Stages:
+    fetch           fetch_html over the local server (shared pooled client)
+    parse           make_soup (BeautifulSoup tree build)
+    metadata        find_main_content + page_metadata
+    sections        build_structure (heading walk, sections + outline)
+    extract         extract_content over the main content
+    scrape_website  end to end: fetch + parse_page
+    category_head   get_category_from_meta, streamed <head> only
+    category_full   get_category_from_meta, whole page parsed
+
+Parsing runs in-process (PARSE_WORKERS=0) so time and memory land in this
+process. Save runs with --out and compare two of them (e.g. two commits) with
+--compare.
+
+Usage (from server-side/):
+    python tools/bench_scrape.py
+    python tools/bench_scrape.py --repeat 10 --backend html.parser --out before.json
+    python tools/bench_scrape.py --compare before.json after.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+BENCH_DIR = os.path.join(ROOT, "fixtures", "bench")
+STAGES = ("fetch", "parse", "metadata", "sections", "extract", "scrape_website", "category_head", "category_full")
+# --compare marks changes beyond this fraction
+THRESHOLD = 0.10
+
+
+def stage_functions(url: str, html: str):
+    """Stage name -> zero-argument callable; inputs are prepared outside the measurement."""
+    from services.category_finder import get_category_from_meta
+    from services.scrape_a_link import build_structure, extract_content, fetch_html, find_main_content, page_metadata, scrape_website
+    from utils.html_parser import make_soup
+
+    soup = make_soup(html)
+    main = find_main_content(soup)
+    title = page_metadata(soup, main, url)["title"]
+    return {
+        "fetch": lambda: fetch_html(url),
+        "parse": lambda: make_soup(html),
+        "metadata": lambda: page_metadata(soup, find_main_content(soup), url),
+        "sections": lambda: build_structure(main, url, title),
+        "extract": lambda: extract_content([main], url),
+        "scrape_website": lambda: scrape_website(url),
+        "category_head": lambda: get_category_from_meta(url, "head"),
+        "category_full": lambda: get_category_from_meta(url, "full"),
+    }
+
+
+def measure(fn, repeat: int) -> dict:
+    fn()  # warm-up: connections, lazy imports, parser selection
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+
+    gc.collect()
+    collections = sum(s["collections"] for s in gc.get_stats())
+    tracemalloc.start()
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    collections = sum(s["collections"] for s in gc.get_stats()) - collections
+    del result
+
+    return {
+        "min_ms": round(min(times), 3),
+        "median_ms": round(statistics.median(times), 3),
+        "mean_ms": round(statistics.fmean(times), 3),
+        "peak_kib": round(peak / 1024, 1),
+        "retained_kib": round(current / 1024, 1),
+        "retained_blocks": blocks,
+        "gc_collections": collections,
+    }
+
+
+def git_revision() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--", "."], cwd=ROOT, capture_output=True, text=True).stdout.strip())
+        return {"commit": commit or None, "dirty": dirty}
+    except OSError:
+        return {"commit": None, "dirty": None}
+
+
+def run(pages: list, stages: list, repeat: int) -> dict:
+    import bs4
+    from local_site import start_site
+    from utils.html_parser import select_backend
+
+    process, base_url = start_site(BENCH_DIR)
+    try:
+        results = {}
+        for name in pages:
+            with open(os.path.join(BENCH_DIR, name), encoding="utf-8") as f:
+                html = f.read()
+            functions = stage_functions(f"{base_url}/{name}", html)
+            results[name] = {"bytes": len(html.encode("utf-8")), "stages": {}}
+            for stage in stages:
+                results[name]["stages"][stage] = measure(functions[stage], repeat)
+                print(f"  {name:<20}{stage:<16}{results[name]['stages'][stage]['median_ms']:>10.1f} ms", file=sys.stderr)
+    finally:
+        process.kill()
+        process.wait()
+
+    return {
+        "meta": {
+            **git_revision(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "html_parser": select_backend(),
+            "bs4": bs4.__version__,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def print_report(report: dict):
+    meta = report["meta"]
+    print(f"\n{meta['commit']}{' (dirty)' if meta['dirty'] else ''}  python {meta['python']}  parser {meta['html_parser']}  x{meta['repeat']}")
+    print(f"  {'page':<20}{'stage':<16}{'median ms':>10}{'min ms':>10}{'peak KiB':>10}{'kept KiB':>10}{'blocks':>9}{'gcs':>5}")
+    for name, page in report["results"].items():
+        for stage, row in page["stages"].items():
+            print(f"  {name:<20}{stage:<16}{row['median_ms']:>10.1f}{row['min_ms']:>10.1f}{row['peak_kib']:>10.0f}"
+                  f"{row['retained_kib']:>10.0f}{row['retained_blocks']:>9}{row['gc_collections']:>5}")
+
+
+def compare(old_path: str, new_path: str) -> int:
+    """Print median time and peak memory changes; returns 1 if anything regressed past THRESHOLD."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']}")
+    print(f"  {'page':<20}{'stage':<16}{'median ms':>22}{'':>9}{'peak KiB':>22}")
+    regressed = False
+    for name, page in new["results"].items():
+        for stage, row in page["stages"].items():
+            before = old["results"].get(name, {}).get("stages", {}).get(stage)
+            if before is None:
+                continue
+            cells = []
+            for key in ("median_ms", "peak_kib"):
+                change = (row[key] - before[key]) / before[key] if before[key] else 0.0
+                flag = " !" if change > THRESHOLD else ""
+                regressed |= bool(flag)
+                cells.append(f"{before[key]:>10.1f} ->{row[key]:>9.1f}{change:>+8.0%}{flag:<2}")
+            print(f"  {name:<20}{stage:<16}" + "".join(cells))
+    return 1 if regressed else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="comma-separated file names from fixtures/bench (default: all)")
+    parser.add_argument("--stages", help=f"comma-separated subset of: {','.join(STAGES)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--backend", help="HTML parser backend (lxml, html.parser); default: auto")
+    parser.add_argument("--out", help="write the report as JSON to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two saved reports")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare)
+
+    os.environ["PARSE_WORKERS"] = "0"
+    if args.backend:
+        os.environ["HTML_PARSER"] = args.backend
+    pages = args.pages.split(",") if args.pages else sorted(n for n in os.listdir(BENCH_DIR) if n.endswith(".html"))
+    stages = args.stages.split(",") if args.stages else list(STAGES)
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    report = run(pages, stages, args.repeat)
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
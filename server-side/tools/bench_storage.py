@@ -0,0 +1,115 @@
+"""Run the same bookmark/recent-search workload against each storage backend.
+
+Backends are driven directly (no per-user cache), so the numbers are the
+backend's own latency. Firestore needs FIREBASE_CREDENTIALS_PATH and writes to
+users/bench-*; with write-behind on, "add" measures the enqueue and the first
+read pays the flush.
+
+Usage (from server-side/):
+    python tools/bench_storage.py                       # sqlite only
+    python tools/bench_storage.py --backends sqlite,firestore --users 5 --items 300
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PAGE_SIZE = 50
+
+
+def timed(samples: dict, op: str, fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    samples.setdefault(op, []).append((time.perf_counter() - started) * 1000)
+    return result
+
+
+def make_backend(name: str):
+    if name == "sqlite":
+        from utils.sqlite_storage import SQLiteStorage
+        return SQLiteStorage(os.path.join(tempfile.mkdtemp(), "bench.db"))
+    from utils.storage import create_backend
+    return create_backend(name)
+
+
+def run_workload(backend, users: int, items: int) -> dict:
+    samples = {}
+    base = datetime.now(timezone.utc)
+    user_ids = [f"bench-{backend.name}-{u}" for u in range(users)]
+    for user_id in user_ids:
+        for i in range(items):
+            timed(samples, "add_bookmark", backend.add, user_id, "bookmarks", {
+                "title": f"Result {i}", "link": f"https://example.com/{i}", "snippet": "lorem ipsum " * 10,
+                "favicon": None, "category": "Article", "site": "example.com",
+                "saved_at": base + timedelta(milliseconds=i),
+            })
+            timed(samples, "add_recent", backend.add, user_id, "recent_searches",
+                  {"query": f"query {i}", "timestamp": base + timedelta(milliseconds=i)})
+
+    for user_id in user_ids:
+        timed(samples, "first_page", backend.page, user_id, "bookmarks", PAGE_SIZE, None, None)
+        timed(samples, "first_page_projected", backend.page, user_id, "bookmarks", PAGE_SIZE, None,
+              ["favicon", "link", "saved_at", "title"])
+        cursor, seen = None, 0
+        while True:
+            page = timed(samples, "next_page", backend.page, user_id, "bookmarks", PAGE_SIZE, cursor, None)
+            seen += len(page)
+            if len(page) < PAGE_SIZE:
+                break
+            cursor = {"value": page[-1]["saved_at"], "id": page[-1]["id"]}
+        assert seen == items, f"{backend.name}: paged {seen} of {items} bookmarks"
+        assert timed(samples, "count", backend.count, user_id, "bookmarks") == items
+        timed(samples, "recent_10", backend.page, user_id, "recent_searches", 10, None, None)
+        first = backend.page(user_id, "bookmarks", 1, None, None)[0]
+        timed(samples, "delete", backend.delete, user_id, "bookmarks", first["id"])
+        timed(samples, "clear_recent", backend.clear, user_id, "recent_searches")
+        timed(samples, "clear_bookmarks", backend.clear, user_id, "bookmarks")
+    backend.close()
+
+    report = {}
+    for op, values in samples.items():
+        values.sort()
+        report[op] = {
+            "n": len(values),
+            "mean_ms": round(statistics.fmean(values), 3),
+            "p50_ms": round(values[len(values) // 2], 3),
+            "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+        }
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="sqlite")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    reports = {}
+    for name in args.backends.split(","):
+        if name == "firestore" and not os.getenv("FIREBASE_CREDENTIALS_PATH"):
+            print("skip firestore: FIREBASE_CREDENTIALS_PATH is not set", file=sys.stderr)
+            continue
+        reports[name] = run_workload(make_backend(name), args.users, args.items)
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return 0
+    for name, report in reports.items():
+        print(f"\n{name} ({args.users} users x {args.items} items)")
+        print(f"  {'op':<22}{'n':>6}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for op, row in report.items():
+            print(f"  {op:<22}{row['n']:>6}{row['mean_ms']:>10}{row['p50_ms']:>10}{row['p95_ms']:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
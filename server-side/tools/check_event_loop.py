@@ -0,0 +1,79 @@
+"""Concurrency check: a slow /content call must not delay a concurrent /recent call.
+
+Starts a local site that answers after SLOW_SECONDS, fires GET /content against it
+and, while that is in flight, GET /recent. Storage uses the SQLite backend in a
+temporary file so the check runs without Firestore credentials.
+
+Usage (from server-side/):
+    python tools/check_event_loop.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SLOW_SECONDS = 2.0
+MAX_RECENT_SECONDS = 0.5
+
+
+class SlowPage(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(SLOW_SECONDS)
+        body = b"<html><head><title>Slow</title></head><body><main><h2>Slow page</h2><p>It took a while to arrive.</p></main></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+async def run(app, slow_url: str) -> float:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+        # Timed from when the /recent call is due, so a blocked loop shows up as latency
+        due = time.perf_counter() + 0.2
+
+        async def recent_after_delay():
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))  # /content is in flight by then
+            response = await client.get("/recent/check-user")
+            assert response.json()["status_code"] == 200
+            return time.perf_counter() - due
+
+        content, recent_seconds = await asyncio.gather(
+            client.get("/content", params={"url": slow_url}, timeout=30),
+            recent_after_delay(),
+        )
+        assert content.json()["status_code"] == 200, content.text
+    return recent_seconds
+
+
+def main() -> int:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowPage)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ.setdefault("GEMINI_API_KEY", "unused")
+    os.environ["STORAGE_BACKEND"] = "sqlite"
+    os.environ["SQLITE_STORAGE_PATH"] = os.path.join(tempfile.mkdtemp(), "check.db")
+    from main import app
+    from utils.storage import store_recent_search
+    store_recent_search("check-user", "linked list")
+
+    recent_seconds = asyncio.run(run(app, f"http://127.0.0.1:{server.server_address[1]}/slow"))
+    server.shutdown()
+    ok = recent_seconds < MAX_RECENT_SECONDS
+    print(f"{'ok  ' if ok else 'FAIL'} /recent answered in {recent_seconds:.3f}s while /content waited {SLOW_SECONDS}s")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
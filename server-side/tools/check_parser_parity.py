@@ -0,0 +1,66 @@
+"""Golden-file check that every installed HTML parser backend produces identical output.
+
+lxml is the reference: html.parser applies lxml's implied end tags (utils/implied_end_tags.py),
+so malformed pages (unclosed <p>, <li>, <td>, ...) extract the same sections on both.
+
+Usage (from server-side/):
+    python tools/check_parser_parity.py            # compare all backends to the goldens
+    python tools/check_parser_parity.py --update   # rewrite goldens with the reference backend
+"""
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.scrape_a_link import parse_page
+from utils.html_parser import available_backends
+
+PAGES_DIR = os.path.join(ROOT, "fixtures", "pages")
+GOLDEN_DIR = os.path.join(ROOT, "fixtures", "golden")
+REFERENCE_BACKEND = "lxml"
+
+
+def normalize(value):
+    """Drop random ids so outputs can be compared structurally."""
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items() if k != "id"}
+    if isinstance(value, list):
+        return [normalize(v) for v in value]
+    return value
+
+
+def structured_output(name: str, backend: str) -> dict:
+    with open(os.path.join(PAGES_DIR, name), encoding="utf-8") as f:
+        html = f.read()
+    return normalize(parse_page(html, f"https://example.com/{name}", backend=backend))
+
+
+def main(update: bool = False) -> int:
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    if update and REFERENCE_BACKEND not in available_backends():
+        print(f"{REFERENCE_BACKEND} is not installed; goldens must be written with the reference backend")
+        return 1
+    failures = 0
+    for name in sorted(os.listdir(PAGES_DIR)):
+        if not name.endswith(".html"):
+            continue
+        golden_path = os.path.join(GOLDEN_DIR, name.replace(".html", ".json"))
+        if update:
+            with open(golden_path, "w", encoding="utf-8") as f:
+                json.dump(structured_output(name, REFERENCE_BACKEND), f, indent=2, ensure_ascii=False)
+                f.write("\n")
+            print(f"updated {golden_path}")
+            continue
+        with open(golden_path, encoding="utf-8") as f:
+            golden = json.load(f)
+        for backend in available_backends():
+            ok = structured_output(name, backend) == golden
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name} [{backend}]")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(update="--update" in sys.argv))
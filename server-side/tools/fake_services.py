@@ -0,0 +1,145 @@
+"""Local stand-ins for the Google Custom Search JSON API and the Gemini API, for load tests.
+
+    GET  /customsearch/v1?q=...&start=N             10 CSE-shaped items per page, linking to --site-url
+    POST /v1beta/models/<model>:generateContent     one canned summary
+    POST /v1beta/models/<model>:streamGenerateContent?alt=sse   the same summary as SSE chunks
+
+Latencies are a mean in seconds with +/- --jitter (a fraction of the mean).
+Point the app at it with GOOGLE_CSE_URL=<base>/customsearch/v1 and
+GEMINI_BASE_URL=<base>/ (see load_test.py, which does this for you).
+
+Usage (from server-side/):
+    python tools/fake_services.py --site-url http://127.0.0.1:8765 --gemini-latency 0.8
+"""
+import argparse
+import hashlib
+import http.server
+import json
+import os
+import random
+import sys
+import time
+from urllib.parse import parse_qs, urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PAGES = "news_nested.html,docs_site.html,wiki_large.html"
+
+SUMMARY = ("The article describes how the regional council approved a new budget for public transit after a "
+           "long debate. It covers the main funding lines, the expected changes to service frequency and fares, "
+           "and the timeline for construction. Supporters pointed to rising ridership and lower emissions, while "
+           "critics questioned the cost estimates and the impact on other city services. The final section lists "
+           "the next steps, including public consultations and a review of the plan after the first year.")
+
+
+class FakeApiHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _pause(self, mean: float):
+        if mean > 0:
+            jitter = self.server.options.jitter
+            time.sleep(max(0.0, mean * random.uniform(1 - jitter, 1 + jitter)))
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/customsearch/v1":
+            return self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+        params = parse_qs(url.query)
+        query = params.get("q", [""])[0]
+        start = int(params.get("start", ["1"])[0])
+        self._pause(self.server.options.cse_latency)
+        if start > self.server.options.cse_results:
+            return self._send_json(200, {"searchInformation": {"totalResults": "0"}})
+
+        options = self.server.options
+        tag = hashlib.sha1(query.encode("utf-8")).hexdigest()[:8]
+        items = []
+        for rank in range(start, min(start + 10, options.cse_results + 1)):
+            page = options.pages[rank % len(options.pages)]
+            link = f"{options.site_url}/{page}?q={tag}&r={rank}"
+            items.append({"title": f"{query.title()} result {rank}", "link": link,
+                          "snippet": f"Snippet {rank} for {query}: " + SUMMARY[:120],
+                          "displayLink": urlparse(link).netloc})
+        self._send_json(200, {"searchInformation": {"totalResults": str(options.cse_results)}, "items": items})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        path = urlparse(self.path).path
+        candidate = {"content": {"role": "model", "parts": [{"text": SUMMARY}]}, "finishReason": "STOP"}
+        if path.endswith(":generateContent"):
+            self._pause(self.server.options.gemini_latency)
+            return self._send_json(200, {"candidates": [candidate], "usageMetadata": {"totalTokenCount": 300}})
+        if path.endswith(":streamGenerateContent"):
+            return self._stream_summary()
+        self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+
+    def _stream_summary(self):
+        # Time to first token is the configured latency, then the rest arrives in small pieces
+        chunks = self.server.options.stream_chunks
+        words = SUMMARY.split(" ")
+        step = max(1, len(words) // chunks)
+        self._pause(self.server.options.gemini_latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for i in range(0, len(words), step):
+            text = " ".join(words[i:i + step]) + (" " if i + step < len(words) else "")
+            event = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+            self.wfile.write(f"data: {json.dumps(event)}\r\n\r\n".encode("utf-8"))
+            self.wfile.flush()
+            self._pause(self.server.options.stream_interval)
+        self.close_connection = True
+
+
+class FakeApiServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--site-url", required=True, help="base URL of the static site the results link to")
+    parser.add_argument("--pages", default=DEFAULT_PAGES, help="comma-separated pages of the site to link to")
+    parser.add_argument("--cse-latency", type=float, default=0.25)
+    parser.add_argument("--cse-results", type=int, default=30, help="total results per query (pages of 10)")
+    parser.add_argument("--gemini-latency", type=float, default=0.8, help="seconds to the response / first token")
+    parser.add_argument("--stream-chunks", type=int, default=10)
+    parser.add_argument("--stream-interval", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.3)
+    args = parser.parse_args(argv)
+    args.site_url = args.site_url.rstrip("/")
+    args.pages = args.pages.split(",")
+    return args
+
+
+def main() -> int:
+    options = parse_args()
+    server = FakeApiServer(("127.0.0.1", options.port), FakeApiHandler)
+    server.options = options
+    # First line of output is the base URL (load_test.py reads it)
+    print(f"http://127.0.0.1:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
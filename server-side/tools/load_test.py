@@ -0,0 +1,332 @@
+"""End-to-end load test of the real app (main.py) against local stand-ins: no CSE quota, no Gemini credits.
+
+Starts, each in its own process:
+    static site     local_site.py over fixtures/bench (pages for /content and the search result links)
+    CSE + Gemini    fake_services.py, with configurable latency
+    the app         uvicorn main:app, with STORAGE_BACKEND=sqlite on a temp file standing in for Firestore
+then drives a weighted mix of /search, /content, /summarize and /bookmark and reports count, errors,
+throughput and p50/p95/p99 per endpoint, plus where the server spent its time (the stage
+histograms from /metrics, measured window only).
+
+By default --concurrency clients send back to back (closed loop), which finds the maximum
+throughput. --rps sends at a fixed arrival rate instead (open loop); latency is then measured
+from each request's scheduled start, so time spent queued behind a stalled server is counted.
+
+Other app settings pass through the environment, e.g. PARSE_WORKERS=2, or SEARCH_CACHE_TTL=0 /
+SUMMARY_CACHE_TTL=0 to send every /search and /summarize to the stand-ins instead of the caches.
+--storage firestore uses the Firestore emulator when FIRESTORE_EMULATOR_HOST (and
+FIREBASE_CREDENTIALS_PATH) are set. The load generator shares the machine with the app; on
+small hosts run it from another machine with --app-url.
+
+Usage (from server-side/):
+    python tools/load_test.py --duration 30 --concurrency 32
+    python tools/load_test.py --rps 20 --mix search=50,content=30,summarize=10,bookmark=10 --out load.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, TOOLS)
+
+from fake_services import DEFAULT_PAGES
+from local_site import DEFAULT_DIR, start_child, start_site
+
+KINDS = ("search", "content", "summarize", "bookmark")
+DEFAULT_MIX = "search=40,content=30,summarize=15,bookmark=15"
+TOPICS = ("transit budget", "python release", "river bridge", "election results", "museum opening",
+          "energy policy", "league season", "railway history", "software library", "health study")
+# Endpoints answer 200 with {"status_code": 4xx/5xx, ...} bodies on failure
+ERROR_BODY = re.compile(rb'^\s*(?:\{"status_code":\s*[45]\d\d|"Error)')
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in KINDS:
+            raise ValueError(f"unknown endpoint in --mix: {kind}")
+        mix[kind.strip()] = float(weight or 1)
+    return {k: w for k, w in mix.items() if w > 0}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(args, api_url: str, log) -> tuple:
+    port = free_port()
+    env = {
+        **os.environ,
+        "GOOGLE_CSE_URL": f"{api_url}/customsearch/v1",
+        "CSE_API_KEY_1": "load-test", "CSE_ENGINE_ID_1": "load-test",
+        "GEMINI_API_KEY": "load-test", "GEMINI_BASE_URL": f"{api_url}/",
+        "STORAGE_BACKEND": args.storage,
+        "SQLITE_STORAGE_PATH": os.path.join(tempfile.mkdtemp(prefix="load-test-"), "storage.db"),
+    }
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(args.app_workers), "--log-level", "warning"]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return process, f"http://127.0.0.1:{port}"
+
+
+def wait_ready(app_url: str, process, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError("the app exited during startup (see the app log)")
+        try:
+            if httpx.get(f"{app_url}/http/stats", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"the app did not answer within {timeout:.0f}s")
+
+
+class Traffic:
+    """Builds the next request of the mix (deterministic for a given --seed)."""
+
+    def __init__(self, args, site_url: str):
+        self.rng = random.Random(args.seed)
+        self.mix = parse_mix(args.mix)
+        self.kinds, self.weights = list(self.mix), list(self.mix.values())
+        self.args = args
+        self.pages = args.pages.split(",")
+        self.site_url = site_url
+
+    def page_url(self) -> str:
+        # ?v= variants defeat the scrape cache for a share of /content and /summarize requests
+        return f"{self.site_url}/{self.rng.choice(self.pages)}?v={self.rng.randrange(self.args.url_variants)}"
+
+    def user(self) -> str:
+        return f"load-user-{self.rng.randrange(self.args.users)}"
+
+    def next(self) -> tuple:
+        """(kind, method, path, request kwargs)"""
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        if kind == "search":
+            query = f"{self.rng.choice(TOPICS)} {self.rng.randrange(self.args.queries)}"
+            return kind, "POST", "/search", {"json": {"query": query, "user_id": self.user()}}
+        if kind == "content":
+            return kind, "GET", "/content", {"params": {"url": self.page_url()}}
+        if kind == "summarize":
+            return kind, "POST", "/summarize", {"json": {"url": self.page_url()}}
+        link = self.page_url()
+        result = {"title": f"Saved {link}", "link": link, "snippet": "Saved during a load test.",
+                  "favicon": None, "category": "News", "site": "127.0.0.1"}
+        return kind, "POST", "/bookmark", {"json": {"user_id": self.user(), "result": result}}
+
+
+async def send(client, request: tuple, scheduled: float, samples: list):
+    kind, method, path, kwargs = request
+    ok = False
+    try:
+        response = await client.request(method, path, **kwargs)
+        ok = response.status_code == 200 and not ERROR_BODY.match(response.content[:64])
+    except httpx.HTTPError:
+        pass
+    samples.append((kind, time.perf_counter() - scheduled, ok))
+
+
+async def closed_loop(client, traffic: Traffic, duration: float, concurrency: int) -> list:
+    samples = []
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            await send(client, traffic.next(), time.perf_counter(), samples)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+async def open_loop(client, traffic: Traffic, duration: float, rps: float, concurrency: int) -> list:
+    samples = []
+    slots = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+    tasks = []
+
+    async def one(request, scheduled):
+        async with slots:
+            await send(client, request, scheduled, samples)
+
+    for i in range(int(duration * rps)):
+        scheduled = started + i / rps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(traffic.next(), scheduled)))
+    await asyncio.gather(*tasks)
+    return samples
+
+
+def percentile(values: list, p: float) -> float:
+    """Nearest-rank percentile of sorted `values`."""
+    return values[min(len(values) - 1, max(0, math.ceil(p / 100 * len(values)) - 1))]
+
+
+def latency_report(samples: list, elapsed: float) -> dict:
+    groups = {"all": samples}
+    for kind in KINDS:
+        rows = [s for s in samples if s[0] == kind]
+        if rows:
+            groups[kind] = rows
+    report = {}
+    for name, rows in groups.items():
+        latencies = sorted(s[1] * 1000 for s in rows)
+        report[name] = {
+            "requests": len(rows),
+            "errors": sum(1 for s in rows if not s[2]),
+            "rps": round(len(rows) / elapsed, 2),
+            "mean_ms": round(sum(latencies) / len(latencies), 1),
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "p99_ms": round(percentile(latencies, 99), 1),
+            "max_ms": round(latencies[-1], 1),
+        }
+    return report
+
+
+STAGE_LINE = re.compile(r'^\w+_stage_duration_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$')
+
+
+def stage_totals(client_url: str) -> dict:
+    """{stage: [seconds, count]} from the app's /metrics (one worker's view with --app-workers > 1)."""
+    totals = {}
+    try:
+        text = httpx.get(f"{client_url}/metrics", timeout=10).text
+    except httpx.HTTPError:
+        return totals
+    for line in text.splitlines():
+        match = STAGE_LINE.match(line)
+        if match:
+            field, stage, value = match.groups()
+            totals.setdefault(stage, [0.0, 0])[0 if field == "sum" else 1] = float(value)
+    return totals
+
+
+def stage_report(before: dict, after: dict) -> dict:
+    report = {}
+    for stage, (seconds, count) in after.items():
+        seconds -= before.get(stage, [0.0, 0])[0]
+        count -= before.get(stage, [0.0, 0])[1]
+        if count > 0:
+            report[stage] = {"count": int(count), "total_s": round(seconds, 3), "mean_ms": round(seconds / count * 1000, 2)}
+    return dict(sorted(report.items(), key=lambda item: -item[1]["total_s"]))
+
+
+async def drive(args, app_url: str, traffic: Traffic, duration: float) -> tuple:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=app_url, timeout=args.timeout, limits=limits) as client:
+        started = time.perf_counter()
+        if args.rps:
+            samples = await open_loop(client, traffic, duration, args.rps, args.concurrency)
+        else:
+            samples = await closed_loop(client, traffic, duration, args.concurrency)
+        return samples, time.perf_counter() - started
+
+
+def print_report(report: dict):
+    setup = report["setup"]
+    mode = f"open loop at {setup['rps']} rps" if setup["rps"] else f"closed loop, {setup['concurrency']} clients"
+    print(f"\n{setup['duration']}s, {mode}, mix {setup['mix']}")
+    print(f"  {'endpoint':<11}{'requests':>9}{'errors':>8}{'rps':>8}{'mean ms':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for name, row in report["latency"].items():
+        print(f"  {name:<11}{row['requests']:>9}{row['errors']:>8}{row['rps']:>8}{row['mean_ms']:>9}"
+              f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}{row['max_ms']:>9}")
+    if report["server_stages"]:
+        print(f"\n  {'server stage':<20}{'count':>8}{'total s':>10}{'mean ms':>10}")
+        for stage, row in list(report["server_stages"].items())[:15]:
+            print(f"  {stage:<20}{row['count']:>8}{row['total_s']:>10}{row['mean_ms']:>10}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of traffic before measuring")
+    parser.add_argument("--concurrency", type=int, default=16, help="clients (closed loop) or max in flight (--rps)")
+    parser.add_argument("--rps", type=float, default=0, help="fixed arrival rate; 0 = closed loop")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--pages", default=DEFAULT_PAGES, help="fixtures/bench pages used by /content and results")
+    parser.add_argument("--url-variants", type=int, default=20, help="distinct URLs per page (scrape cache misses)")
+    parser.add_argument("--queries", type=int, default=50, help="distinct queries per topic (search cache misses)")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--cse-latency", type=float, default=0.25)
+    parser.add_argument("--gemini-latency", type=float, default=0.8)
+    parser.add_argument("--storage", default="sqlite", help="STORAGE_BACKEND for the app")
+    parser.add_argument("--app-workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--app-url", help="drive an already running app instead of starting one")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    children = []
+    log = tempfile.NamedTemporaryFile("w", prefix="load-test-app-", suffix=".log", delete=False)
+    try:
+        site, site_url = start_site(DEFAULT_DIR)
+        children.append(site)
+        api, api_url = start_child(os.path.join(TOOLS, "fake_services.py"), "--site-url", site_url, "--pages", args.pages,
+                                   "--cse-latency", str(args.cse_latency), "--gemini-latency", str(args.gemini_latency))
+        children.append(api)
+        if args.app_url:
+            app, app_url = None, args.app_url.rstrip("/")
+        else:
+            app, app_url = start_app(args, api_url, log)
+            children.append(app)
+            print(f"App log: {log.name}", file=sys.stderr)
+        wait_ready(app_url, app)
+
+        traffic = Traffic(args, site_url)
+        if args.warmup > 0:
+            print(f"Warming up for {args.warmup:.0f}s...", file=sys.stderr)
+            asyncio.run(drive(args, app_url, traffic, args.warmup))
+        before = stage_totals(app_url)
+        print(f"Measuring for {args.duration:.0f}s...", file=sys.stderr)
+        samples, elapsed = asyncio.run(drive(args, app_url, traffic, args.duration))
+        after = stage_totals(app_url)
+    finally:
+        for child in reversed(children):
+            child.terminate()
+        for child in children:
+            try:
+                child.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                child.kill()
+        log.close()
+
+    if not samples:
+        print("No requests completed.", file=sys.stderr)
+        return 1
+    report = {
+        "setup": {key: getattr(args, key) for key in ("duration", "warmup", "concurrency", "rps", "mix", "pages",
+                                                     "url_variants", "queries", "users", "cse_latency",
+                                                     "gemini_latency", "storage", "app_workers", "seed")},
+        "latency": latency_report(samples, elapsed),
+        "server_stages": stage_report(before, after),
+    }
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
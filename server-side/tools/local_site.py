@@ -0,0 +1,81 @@
+"""Local stand-in web server for benchmarks: serves a directory of saved pages over HTTP.
+
+Responses carry Content-Length, Last-Modified and a charset, and honour
+If-Modified-Since, so the scraper's conditional fetches work against it.
+Run it in its own process (start_site) so its work does not show up in the
+measurements of the process under test.
+
+Usage (from server-side/):
+    python tools/local_site.py                          # serves fixtures/bench on a free port
+    python tools/local_site.py --dir fixtures/pages --port 8765
+"""
+import argparse
+import http.server
+import os
+import subprocess
+import sys
+from functools import partial
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DIR = os.path.join(ROOT, "fixtures", "bench")
+
+
+class SiteHandler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real origin
+    extensions_map = {**http.server.SimpleHTTPRequestHandler.extensions_map, ".html": "text/html; charset=utf-8"}
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SiteServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that stop reading early (the <head>-only category fetch) just drop the connection
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def serve(directory: str, port: int = 0):
+    """Bind and return the server (call serve_forever() on it)."""
+    handler = partial(SiteHandler, directory=directory)
+    return SiteServer(("127.0.0.1", port), handler)
+
+
+def start_child(script: str, *args: str):
+    """Run a stand-in server script in a child process; returns (process, base_url).
+
+    The script must print its base URL as the first line of output.
+    """
+    process = subprocess.Popen([sys.executable, script, *args], stdout=subprocess.PIPE, text=True)
+    base_url = process.stdout.readline().strip()
+    if not base_url.startswith("http"):
+        process.kill()
+        raise RuntimeError(f"{os.path.basename(script)} failed to start")
+    return process, base_url
+
+
+def start_site(directory: str = DEFAULT_DIR):
+    """Start this server in a child process; returns (process, base_url)."""
+    return start_child(os.path.abspath(__file__), "--dir", directory)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=DEFAULT_DIR)
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+
+    server = serve(args.dir, args.port)
+    # First line of output is the base URL (start_site reads it)
+    print(f"http://127.0.0.1:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
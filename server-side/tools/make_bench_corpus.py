@@ -0,0 +1,259 @@
+"""Regenerate the benchmark corpus in fixtures/bench/ (checked in; output is deterministic).
+
+Pages are synthetic but shaped like the real thing: the markup patterns,
+nesting and boilerplate that the scraper walks, at realistic sizes.
+
+    wiki_large.html    long Wikipedia article: infobox, TOC, 40 sections, references, navboxes
+    news_nested.html   news page buried in wrapper divs, ads, scripts, asides and threaded comments
+    docs_site.html     documentation page: huge sidebar, h1-h4 tree, code blocks, tables
+    deep_nesting.html  pathological: thousands of nested elements
+    huge_list.html     pathological: tens of thousands of list items, three levels deep
+
+Usage (from server-side/):
+    python tools/make_bench_corpus.py [--out DIR]
+"""
+import argparse
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, "fixtures", "bench")
+
+WORDS = (
+    "the of and to in is was for on that with as by at from his her it an were which are this be has had "
+    "also first new after two one their its who been other more into during time only year city state "
+    "history system river century government war world between population known while later under most "
+    "music energy station design research computer network language science series early national company "
+    "software data model engine protocol release version support user library module function value "
+    "article report market policy minister election economy health player season team league record "
+    "museum bridge railway island mountain village temple dynasty empire treaty council university"
+).split()
+
+
+class Writer:
+    """Deterministic lorem text and a list of markup chunks."""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.parts = []
+
+    def words(self, lo: int, hi: int) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(self.rng.randint(lo, hi)))
+
+    def title(self, lo: int = 2, hi: int = 5) -> str:
+        return self.words(lo, hi).title()
+
+    def sentence(self) -> str:
+        return self.words(8, 22).capitalize() + "."
+
+    def paragraph(self, links: int = 0, refs: int = 0) -> str:
+        sentences = [self.sentence() for _ in range(self.rng.randint(3, 7))]
+        for _ in range(links):
+            i = self.rng.randrange(len(sentences))
+            target = self.title(1, 3)
+            sentences[i] += f' See <a href="/wiki/{target.replace(" ", "_")}" title="{target}">{target.lower()}</a>.'
+        for _ in range(refs):
+            n = self.rng.randint(1, 400)
+            i = self.rng.randrange(len(sentences))
+            sentences[i] += f'<sup class="reference" id="cite_ref-{n}"><a href="#cite_note-{n}">[{n}]</a></sup>'
+        return "<p>" + " ".join(sentences) + "</p>"
+
+    def add(self, *chunks):
+        self.parts.extend(chunks)
+
+    def html(self) -> str:
+        return "\n".join(self.parts) + "\n"
+
+
+def head(w: Writer, title: str, keywords: str, description: str) -> str:
+    return (f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>{title}</title>'
+            f'<meta name="keywords" content="{keywords}"><meta name="description" content="{description}">'
+            f'<meta property="og:description" content="{description}">'
+            f'<meta property="article:published_time" content="2024-03-{w.rng.randint(10, 28)}T08:00:00Z">'
+            '<link rel="stylesheet" href="/static/site.css">'
+            '<script>window.dataLayer=window.dataLayer||[];function gtag(){dataLayer.push(arguments)}</script>'
+            '</head>')
+
+
+def wiki_large() -> str:
+    w = Writer(1)
+    w.add(head(w, "Grand Valley Railway - Wikipedia", "history, railway, encyclopedia", "Encyclopedia article on a railway"))
+    w.add('<body class="mediawiki"><div id="mw-navigation"><nav id="mw-panel"><ul>')
+    w.add(*(f'<li><a href="/wiki/Portal:{w.title(1, 2)}">{w.title(1, 3)}</a></li>' for _ in range(120)))
+    w.add('</ul></nav></div><div id="content" class="mw-body"><h1 id="firstHeading">Grand Valley Railway</h1>')
+    w.add('<div id="mw-content-text" class="mw-body-content"><div class="mw-parser-output">')
+    w.add('<table class="infobox vcard"><tbody>')
+    w.add(*(f'<tr><th scope="row">{w.title(1, 3)}</th><td>{w.words(2, 8)}</td></tr>' for _ in range(30)))
+    w.add('</tbody></table>')
+    w.add(*(w.paragraph(links=4, refs=3) for _ in range(5)))
+    w.add('<div id="toc" class="toc"><ul>')
+    sections = [w.title() for _ in range(40)]
+    w.add(*(f'<li class="toclevel-1"><a href="#s{i}"><span class="tocnumber">{i + 1}</span> {t}</a></li>'
+            for i, t in enumerate(sections)))
+    w.add('</ul></div>')
+    for i, section in enumerate(sections):
+        w.add(f'<h2><span class="mw-headline" id="s{i}">{section}</span>'
+              '<span class="mw-editsection">[<a href="?action=edit">edit</a>]</span></h2>')
+        w.add(*(w.paragraph(links=3, refs=2) for _ in range(w.rng.randint(3, 8))))
+        if i % 5 == 0:
+            w.add(f'<figure class="mw-default-size"><a href="/wiki/File:{i}.jpg"><img src="//upload.example.org/{i}.jpg" '
+                  f'alt="{w.words(3, 6)}" width="220"></a><figcaption>{w.sentence()}</figcaption></figure>')
+        for j in range(w.rng.randint(0, 5)):
+            w.add(f'<h3><span class="mw-headline" id="s{i}_{j}">{w.title()}</span></h3>')
+            w.add(*(w.paragraph(links=2, refs=1) for _ in range(w.rng.randint(2, 5))))
+            if w.rng.random() < 0.3:
+                w.add("<ul>" + "".join(f"<li>{w.words(6, 16)}</li>" for _ in range(w.rng.randint(4, 12))) + "</ul>")
+            if w.rng.random() < 0.2:
+                w.add(f'<h4><span class="mw-headline">{w.title()}</span></h4>', w.paragraph(links=1))
+        if i % 8 == 3:
+            w.add('<table class="wikitable"><tr><th>Year</th><th>Passengers</th><th>Notes</th></tr>')
+            w.add(*(f"<tr><td>{1900 + r}</td><td>{w.rng.randint(1000, 99999)}</td><td>{w.words(3, 8)}</td></tr>"
+                    for r in range(25)))
+            w.add("</table>")
+    w.add('<h2><span class="mw-headline" id="References">References</span></h2><div class="reflist"><ol class="references">')
+    w.add(*(f'<li id="cite_note-{n}"><span class="reference-text"><cite class="citation book">{w.title(3, 8)}. '
+            f'<a class="external text" href="https://books.example.org/{n}">{w.words(4, 9)}</a>. {w.rng.randint(1950, 2023)}.'
+            '</cite></span></li>' for n in range(1, 401)))
+    w.add('</ol></div>')
+    for _ in range(4):
+        w.add('<div role="navigation" class="navbox"><table class="nowraplinks"><tr><td class="navbox-list">')
+        w.add(" · ".join(f'<a href="/wiki/{w.title(1, 2)}">{w.title(1, 3)}</a>' for _ in range(150)))
+        w.add('</td></tr></table></div>')
+    w.add('</div></div></div><footer id="footer"><ul>')
+    w.add(*(f"<li>{w.sentence()}</li>" for _ in range(10)))
+    w.add('</ul></footer><script>' + "var x=1;" * 2000 + '</script></body></html>')
+    return w.html()
+
+
+def news_nested() -> str:
+    w = Writer(2)
+    w.add(head(w, "Council approves new transit budget | Daily Ledger", "news, politics, city, journal",
+               "Breaking news and headline reports from the city desk"))
+    w.add('<body><header class="site-header"><nav><ul>')
+    w.add(*(f'<li><a href="/section/{i}">{w.title(1, 2)}</a></li>' for i in range(60)))
+    w.add('</ul></nav></header>')
+    depth = 28
+    w.add(*(f'<div class="wrap-{d} layout grid" data-slot="{d}">' for d in range(depth)))
+    w.add('<main><article class="story"><h1 class="headline">Council approves new transit budget</h1>')
+    w.add('<div class="byline"><span class="author-name">By Jordan Avery</span> '
+          '<time itemprop="datePublished" content="2024-03-14T08:00:00Z">March 14, 2024</time></div>')
+    for block in range(30):
+        if block % 4 == 0:
+            w.add(f"<h2>{w.title(3, 7)}</h2>")
+        inner = w.paragraph(links=1)
+        for d in range(w.rng.randint(2, 8)):
+            inner = f'<div class="story-block level-{d}"><div class="rich-text">{inner}</div></div>'
+        w.add(inner)
+        if block % 3 == 1:
+            w.add('<div class="ad-slot"><script>googletag.cmd.push(function(){});</script>'
+                  '<iframe src="https://ads.example.com/frame" width="300" height="250"></iframe>'
+                  '<p>Advertisement - continue reading below</p></div>')
+        if block % 5 == 2:
+            w.add('<aside class="related"><h3>Related coverage</h3><ul>' +
+                  "".join(f'<li><a href="/story/{w.rng.randint(1, 9999)}">{w.words(5, 10)}</a></li>' for _ in range(6)) +
+                  "</ul></aside>")
+    w.add('</article>')
+    w.add('<section class="comments"><h2>Comments</h2>')
+
+    def thread(level: int):
+        for _ in range(w.rng.randint(1, 3 if level else 25)):
+            w.add(f'<div class="comment level-{level}"><span class="user">{w.title(1, 2)}</span>{w.paragraph()}')
+            if level < 6 and w.rng.random() < 0.5:
+                thread(level + 1)
+            w.add('</div>')
+    thread(0)
+    w.add('</section></main>')
+    w.add("</div>" * depth)
+    w.add('<footer><p>Copyright Daily Ledger. All rights reserved.</p><ul>' +
+          "".join(f'<li><a href="/about/{i}">{w.title(1, 2)}</a></li>' for i in range(40)) + "</ul></footer>")
+    w.add('<script>' + "track();" * 3000 + '</script></body></html>')
+    return w.html()
+
+
+def docs_site() -> str:
+    w = Writer(3)
+    w.add(head(w, "Client API reference - Example SDK docs", "software, developer, programming, tutorial",
+               "Developer documentation and programming tutorial for the SDK"))
+    w.add('<body><div class="docs"><nav class="sidebar"><ul>')
+    for group in range(25):
+        w.add(f'<li class="group"><span>{w.title(1, 3)}</span><ul>' +
+              "".join(f'<li><a href="/docs/{group}/{i}">{w.title(1, 4)}</a></li>' for i in range(16)) + "</ul></li>")
+    w.add('</ul></nav><main class="content"><h1>Client API reference</h1>', w.paragraph(links=2))
+    for chapter in range(12):
+        w.add(f"<h2>{w.title()}</h2>", w.paragraph(links=1))
+        for topic in range(w.rng.randint(2, 5)):
+            name = "_".join(w.words(2, 3).split())
+            w.add(f'<h3 id="{name}"><code>{name}()</code></h3>', w.paragraph())
+            w.add('<pre><code class="language-python">' +
+                  "\n".join(f"    {w.rng.choice(WORDS)} = client.{name}({w.rng.choice(WORDS)}={i})" for i in range(12)) +
+                  "</code></pre>")
+            w.add("<h4>Parameters</h4><ul>" +
+                  "".join(f"<li><code>{w.rng.choice(WORDS)}</code> ({w.rng.choice(['str', 'int', 'bool'])}): {w.words(6, 14)}</li>"
+                          for _ in range(w.rng.randint(3, 8))) + "</ul>")
+            if topic % 2 == 0:
+                w.add('<table><tr><th>Code</th><th>Meaning</th></tr>' +
+                      "".join(f"<tr><td>{400 + i}</td><td>{w.words(4, 9)}</td></tr>" for i in range(10)) + "</table>")
+            w.add(f'<div class="admonition note"><p class="admonition-title">Note</p>{w.paragraph()}</div>')
+    w.add('</main></div><footer><p>Built with an example documentation generator.</p></footer></body></html>')
+    return w.html()
+
+
+def deep_nesting() -> str:
+    w = Writer(4)
+    w.add(head(w, "Deeply nested page", "", ""))
+    w.add("<body><main>")
+    depth = 3000
+    for level in range(depth):
+        w.add(f'<div class="n{level % 7}">')
+        if level % 100 == 0:
+            w.add(f"<h{2 + (level // 100) % 4}>{w.title()}</h{2 + (level // 100) % 4}>")
+        if level % 10 == 0:
+            w.add(f"<p>{w.sentence()}</p>")
+    w.add("</div>" * depth)
+    w.add("</main></body></html>")
+    return w.html()
+
+
+def huge_list() -> str:
+    w = Writer(5)
+    w.add(head(w, "Index of all items", "", ""))
+    w.add("<body><main><h1>Index of all items</h1>")
+    for group in range(20):
+        w.add(f"<h2>{w.title()}</h2><ul>")
+        for i in range(300):
+            w.add(f'<li><a href="/item/{group}/{i}">{w.words(2, 5)}</a> {w.words(4, 10)}')
+            if i % 10 == 0:
+                # Nested lists: each outer <li>'s text includes its children's
+                w.add("<ul>" + "".join(f"<li>{w.words(3, 8)}<ul><li>{w.words(3, 6)}</li></ul></li>" for _ in range(4)) + "</ul>")
+            w.add("</li>")
+        w.add("</ul>")
+    w.add("</main></body></html>")
+    return w.html()
+
+
+PAGES = {
+    "wiki_large.html": wiki_large,
+    "news_nested.html": news_nested,
+    "docs_site.html": docs_site,
+    "deep_nesting.html": deep_nesting,
+    "huge_list.html": huge_list,
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=BENCH_DIR, help="directory to write the pages to (default: fixtures/bench)")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for name, build in PAGES.items():
+        html = build()
+        with open(os.path.join(args.out, name), "w", encoding="utf-8", newline="\n") as f:
+            f.write(html)
+        print(f"{name:<20}{len(html.encode('utf-8')) / 1024:>8.0f} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
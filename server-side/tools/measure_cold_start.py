@@ -0,0 +1,170 @@
+"""Measure cold start: import time of main.py and time from process spawn to first response.
+
+For each run a fresh `uvicorn main:app` process is spawned and the path is
+requested until it answers; "first response" is spawn -> that answer, and
+"request" is the latency of the answering request itself (where lazy clients
+get created). Also reports the slowest imports (python -X importtime) and
+which heavy modules `import main` loads.
+
+Paths may contain {site}, which is replaced by a local site serving fixtures/bench
+(local_site.py). STORAGE_BACKEND defaults to sqlite on a temp file; other settings
+(e.g. WARMUP=all) pass through the environment or --warmup.
+
+Usage (from server-side/):
+    python tools/measure_cold_start.py
+    python tools/measure_cold_start.py --runs 5 --warmup all --json
+    python tools/measure_cold_start.py --paths "/recent/u1,/content?url={site}/news_nested.html"
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from local_site import start_site
+
+DEFAULT_PATHS = "/recent/cold-start-user,/content?url={site}/news_nested.html"
+# Modules that should only load when a request needs them
+HEAVY_MODULES = ("google.genai", "firebase_admin", "google.cloud.firestore", "bs4", "lxml", "requests")
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def app_env(args) -> dict:
+    env = {**os.environ}
+    env.setdefault("STORAGE_BACKEND", "sqlite")
+    env.setdefault("SQLITE_STORAGE_PATH", os.path.join(tempfile.mkdtemp(prefix="cold-start-"), "storage.db"))
+    if args.warmup is not None:
+        env["WARMUP"] = args.warmup
+    return env
+
+
+def measure_imports(env: dict, top: int) -> dict:
+    """Cumulative import time of main and its slowest direct and nested imports."""
+    probe = f"import json, sys, main; print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{result.stderr[-2000:]}")
+    modules, children, direct = [], [], []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        module = {"module": name, "depth": len(indent) // 2, "self_ms": int(self_us) / 1000,
+                  "cumulative_ms": int(cumulative_us) / 1000}
+        modules.append(module)
+        # -X importtime prints a module's imports before the module itself
+        if module["depth"] == 1:
+            children.append(module)
+        elif module["depth"] == 0:
+            if name == "main":
+                direct = sorted(children, key=lambda m: -m["cumulative_ms"])
+            children = []
+    main = next(m for m in modules if m["module"] == "main")
+    return {
+        "main_ms": main["cumulative_ms"],
+        "heavy_loaded": json.loads(result.stdout.strip().splitlines()[-1]),
+        "slowest_direct": direct[:top],
+        "slowest_self": sorted(modules, key=lambda m: -m["self_ms"])[:top],
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def first_response(path: str, env: dict, timeout: float) -> dict:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}{path}"
+    spawned = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                                "--log-level", "warning"], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - spawned < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"the app exited during startup (exit code {process.returncode})")
+            sent = time.perf_counter()
+            try:
+                response = httpx.get(url, timeout=timeout)
+            except httpx.TransportError:
+                time.sleep(0.01)
+                continue
+            answered = time.perf_counter()
+            return {"first_response_ms": (answered - spawned) * 1000, "request_ms": (answered - sent) * 1000,
+                    "status": response.status_code}
+        raise RuntimeError(f"no response from {path} within {timeout:.0f}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def summarize(values: list) -> dict:
+    return {"median": round(statistics.median(values), 1), "min": round(min(values), 1), "max": round(max(values), 1)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paths", default=DEFAULT_PATHS, help="comma-separated first requests to time")
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per path")
+    parser.add_argument("--warmup", help="WARMUP value for the app (e.g. all, genai,storage)")
+    parser.add_argument("--top", type=int, default=8, help="slowest imports to list")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    env = app_env(args)
+    report = {"imports": measure_imports(env, args.top), "first_response": {}}
+    site = None
+    try:
+        paths = args.paths.split(",")
+        if any("{site}" in p for p in paths):
+            site, site_url = start_site()
+            paths = [p.replace("{site}", site_url) for p in paths]
+        for path in paths:
+            runs = [first_response(path, env, args.timeout) for _ in range(args.runs)]
+            report["first_response"][path] = {
+                "status": runs[-1]["status"],
+                "first_response_ms": summarize([r["first_response_ms"] for r in runs]),
+                "request_ms": summarize([r["request_ms"] for r in runs]),
+            }
+    finally:
+        if site is not None:
+            site.kill()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    imports = report["imports"]
+    print(f"import main: {imports['main_ms']:.0f} ms; heavy modules loaded: {', '.join(imports['heavy_loaded']) or 'none'}")
+    print("  slowest imports by main (cumulative ms):")
+    for m in imports["slowest_direct"]:
+        print(f"    {m['module']:<40}{m['cumulative_ms']:>8.1f}")
+    print(f"\nfirst response from a fresh process (median of {args.runs}; min-max)")
+    print(f"  {'path':<50}{'status':>7}{'spawn -> response ms':>24}{'request ms':>20}")
+    for path, row in report["first_response"].items():
+        first, request = row["first_response_ms"], row["request_ms"]
+        label = path if len(path) <= 48 else path[:45] + "..."
+        print(f"  {label:<50}{row['status']:>7}{first['median']:>10.0f} ({first['min']:.0f}-{first['max']:.0f})"
+              f"{request['median']:>10.0f} ({request['min']:.0f}-{request['max']:.0f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+
+class DiskCache:
+    """Gzip-compressed JSON values in a directory, bounded by total size.
+
+    Reads touch the file's mtime, so eviction (oldest mtime first, down to 90%
+    of `max_bytes`) drops the least recently used entries. Writes go through a
+    temp file and os.replace, so readers never see a partial file.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, compress_level: int = 6):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "errors": 0}
+        os.makedirs(directory, exist_ok=True)
+        self._bytes = sum(os.path.getsize(p) for p in self._files())
+
+    def _files(self):
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json.gz")]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json.gz")
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = json.loads(gzip.decompress(f.read()))
+            os.utime(path)
+        except FileNotFoundError:
+            self._stats["misses"] += 1
+            return None
+        except (OSError, ValueError) as e:
+            self._stats["errors"] += 1
+            print(f"⚠️ Dropping unreadable cache file {path}: {e}")
+            self.delete(key)
+            return None
+        self._stats["hits"] += 1
+        return value
+
+    def set(self, key: str, value):
+        path = self._path(key)
+        blob = gzip.compress(json.dumps(value, default=str).encode("utf-8"), self.compress_level)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(tmp, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, path)
+            self._bytes += len(blob) - old_size
+            self._stats["writes"] += 1
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str):
+        path = self._path(key)
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self._bytes -= size
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        target = self.max_bytes * 0.9
+        files = []
+        for path in self._files():
+            try:
+                st = os.stat(path)
+                files.append((st.st_mtime, st.st_size, path))
+            except FileNotFoundError:
+                continue
+        files.sort()
+        for _, size, path in files:
+            if self._bytes <= target:
+                break
+            try:
+                os.remove(path)
+                self._bytes -= size
+                self._stats["evictions"] += 1
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "bytes": self._bytes, "max_bytes": self.max_bytes, "directory": self.directory}
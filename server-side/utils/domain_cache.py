@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import threading
+import time
+from utils.ttl_cache import TTLCache
+
+# Domain -> (category, site, last_checked). The category is a property of the site,
+# so one classification serves every link on that domain until it expires.
+TTL_SECONDS = float(os.getenv("DOMAIN_CACHE_TTL", str(7 * 24 * 3600)))
+MAX_ENTRIES = int(os.getenv("DOMAIN_CACHE_MAX_ENTRIES", "5000"))
+# Optional on-disk tier so classifications survive restarts (empty = memory only)
+DB_PATH = os.getenv("DOMAIN_CACHE_DB", "")
+DB_MAX_ROWS = int(os.getenv("DOMAIN_CACHE_DB_MAX_ROWS", "100000"))
+
+_memory = TTLCache(max_entries=MAX_ENTRIES, ttl=TTL_SECONDS)
+_db = None
+_db_lock = threading.Lock()
+_db_writes = 0
+
+
+def _connect():
+    global _db
+    if _db is None and DB_PATH:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS domain_categories ("
+            "domain TEXT PRIMARY KEY, category TEXT NOT NULL, site TEXT NOT NULL, last_checked REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_domain_last_checked ON domain_categories (last_checked)")
+        conn.commit()
+        _db = conn
+    return _db
+
+
+def _prune_disk(conn, now: float):
+    conn.execute("DELETE FROM domain_categories WHERE last_checked < ?", (now - TTL_SECONDS,))
+    conn.execute(
+        "DELETE FROM domain_categories WHERE domain IN ("
+        "SELECT domain FROM domain_categories ORDER BY last_checked DESC LIMIT -1 OFFSET ?)",
+        (DB_MAX_ROWS,),
+    )
+
+
+def get_domain_category(domain: str):
+    """Return {"category", "site", "last_checked"} for a fresh entry, else None."""
+    entry = _memory.get(domain)
+    if entry is not None:
+        return entry
+    with _db_lock:
+        conn = _connect()
+        if conn is None:
+            return None
+        row = conn.execute(
+            "SELECT category, site, last_checked FROM domain_categories WHERE domain = ?", (domain,)
+        ).fetchone()
+    if not row or row[2] + TTL_SECONDS <= time.time():
+        return None
+    entry = {"category": row[0], "site": row[1], "last_checked": row[2]}
+    _memory.set(domain, entry, stored_at=row[2])
+    return entry
+
+
+def store_domain_category(domain: str, category: str, site: str):
+    """Record a fresh classification in both tiers."""
+    global _db_writes
+    now = time.time()
+    entry = {"category": category, "site": site, "last_checked": now}
+    _memory.set(domain, entry, stored_at=now)
+    with _db_lock:
+        conn = _connect()
+        if conn is None:
+            return
+        conn.execute(
+            "INSERT OR REPLACE INTO domain_categories (domain, category, site, last_checked) VALUES (?, ?, ?, ?)",
+            (domain, category, site, now),
+        )
+        _db_writes += 1
+        if _db_writes % 500 == 0:
+            _prune_disk(conn, now)
+        conn.commit()
+
+
+def domain_cache_stats() -> dict:
+    return {**_memory.stats(), "disk_enabled": bool(DB_PATH)}
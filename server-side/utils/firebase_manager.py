@@ -1,73 +1,119 @@
 import json
 import firebase_admin
 from firebase_admin import credentials, firestore
-from datetime import datetime
 import os
 from dotenv import load_dotenv
+from utils import metrics
+from utils.storage import COLLECTIONS, StorageBackend
+from utils.write_behind import WriteBehindQueue
 
 load_dotenv()
 
-# Initialize Firebase once
-if not firebase_admin._apps:
-    service_account_info = json.loads(os.environ["FIREBASE_CREDENTIALS_PATH"])
-    cred = credentials.Certificate(service_account_info)
-    firebase_admin.initialize_app(cred)
-
-db = firestore.client()
-
-def store_recent_search(user_id: str, query: str):
-    """Store a recent search for a given user. Returns document id."""
-    ref = db.collection("users").document(user_id).collection("recent_searches").document()
-    ref.set({
-        "query": query,
-        "timestamp": datetime.utcnow(),
-    })
-    return ref.id
-
-def store_bookmark(user_id: str, result: dict):
-    """Save a bookmarked search result. Returns document id."""
-    ref = db.collection("users").document(user_id).collection("bookmarks").document()
-    ref.set({
-        "title": result.get("title"),
-        "link": result.get("link"),
-        "snippet": result.get("snippet"),
-        "favicon": result.get("favicon"),
-        "category": result.get("category"),
-        "site": result.get("site"),
-        "saved_at": datetime.utcnow(),
-    })
-    return ref.id
-
-def get_recent_searches(user_id: str, limit=10):
-    """Fetch recent searches including document ids."""
-    ref = db.collection("users").document(user_id).collection("recent_searches")
-    docs = ref.order_by("timestamp", direction=firestore.Query.DESCENDING).limit(limit).stream()
-    items = []
-    for doc in docs:
-        d = doc.to_dict()
-        d["id"] = doc.id
-        items.append(d)
-    return items
-
-def get_bookmarks(user_id: str):
-    """Fetch all bookmarks including document ids."""
-    ref = db.collection("users").document(user_id).collection("bookmarks")
-    docs = ref.order_by("saved_at", direction=firestore.Query.DESCENDING).stream()
-    items = []
-    for doc in docs:
-        d = doc.to_dict()
-        d["id"] = doc.id
-        items.append(d)
-    return items
-
-def delete_recent_search(user_id: str, doc_id: str):
-    db.collection("users").document(user_id).collection("recent_searches").document(doc_id).delete()
-
-def clear_recent_searches(user_id: str):
-    ref = db.collection("users").document(user_id).collection("recent_searches")
-    docs = ref.stream()
-    for d in docs:
-        d.reference.delete()
-
-def delete_bookmark(user_id: str, doc_id: str):
-    db.collection("users").document(user_id).collection("bookmarks").document(doc_id).delete()
+# Firestore caps a batched write at 500 operations
+BATCH_LIMIT = 500
+# Recent searches and bookmark saves are written behind the request ("0" writes inline)
+WRITE_BEHIND = os.getenv("FIRESTORE_WRITE_BEHIND", "1").lower() not in ("0", "false", "no")
+WRITE_FLUSH_INTERVAL = float(os.getenv("FIRESTORE_FLUSH_INTERVAL", "0.5"))
+WRITE_MAX_PENDING = int(os.getenv("FIRESTORE_MAX_PENDING_WRITES", "10000"))
+
+
+def get_db():
+    """Initialize Firebase once and return the Firestore client."""
+    if not firebase_admin._apps:
+        service_account_info = json.loads(os.environ["FIREBASE_CREDENTIALS_PATH"])
+        cred = credentials.Certificate(service_account_info)
+        firebase_admin.initialize_app(cred)
+    return firestore.client()
+
+
+class FirestoreStorage(StorageBackend):
+    """users/{user_id}/{collection}/{doc_id} documents in Cloud Firestore."""
+
+    name = "firestore"
+
+    def __init__(self, db=None):
+        self.db = db or get_db()
+        self._writes = WriteBehindQueue(self.commit_batched, max_batch=BATCH_LIMIT, flush_interval=WRITE_FLUSH_INTERVAL,
+                                        max_pending=WRITE_MAX_PENDING, name="firestore-writes")
+
+    def _collection(self, user_id: str, collection: str):
+        return self.db.collection("users").document(user_id).collection(collection)
+
+    @metrics.timed("firestore_commit")
+    def commit_batched(self, ops):
+        """Apply ("set", ref, data) / ("delete", ref, None) ops in batched commits."""
+        for start in range(0, len(ops), BATCH_LIMIT):
+            batch = self.db.batch()
+            for kind, ref, data in ops[start:start + BATCH_LIMIT]:
+                if kind == "delete":
+                    batch.delete(ref)
+                else:
+                    batch.set(ref, data)
+            batch.commit()
+
+    @metrics.timed("firestore_add")
+    def add(self, user_id: str, collection: str, data: dict) -> str:
+        ref = self._collection(user_id, collection).document()
+        # Document ids are generated client-side, so callers get the id before the commit lands
+        if not (WRITE_BEHIND and self._writes.submit(("set", ref, data), key=user_id)):
+            ref.set(data)
+        return ref.id
+
+    @metrics.timed("firestore_page")
+    def page(self, user_id: str, collection: str, limit=None, cursor=None, fields=None) -> list:
+        order_field = COLLECTIONS[collection]["order_field"]
+        self._flush_user(user_id)  # read-your-writes for this user's queued writes
+        # The document id breaks ties between equal timestamps so pages never overlap
+        query = (self._collection(user_id, collection)
+                 .order_by(order_field, direction=firestore.Query.DESCENDING)
+                 .order_by("__name__", direction=firestore.Query.DESCENDING))
+        if fields:
+            query = query.select(fields)
+        if cursor:
+            query = query.start_after({order_field: cursor["value"], "__name__": cursor["id"]})
+        if limit:
+            query = query.limit(limit)
+        items = []
+        for doc in query.stream():
+            d = doc.to_dict()
+            d["id"] = doc.id
+            items.append(d)
+        return items
+
+    @metrics.timed("firestore_count")
+    def count(self, user_id: str, collection: str) -> int:
+        """Server-side count aggregation; no documents are read."""
+        self._flush_user(user_id)
+        result = self._collection(user_id, collection).count(alias="total").get()
+        return int(result[0][0].value)
+
+    @metrics.timed("firestore_delete")
+    def delete(self, user_id: str, collection: str, doc_id: str):
+        self._flush_user(user_id)  # a queued set must not land after its delete
+        self._collection(user_id, collection).document(doc_id).delete()
+
+    @metrics.timed("firestore_clear")
+    def clear(self, user_id: str, collection: str) -> int:
+        """Delete in batched commits; list_documents reads only the ids, never the bodies."""
+        self._flush_user(user_id)
+        refs = list(self._collection(user_id, collection).list_documents(page_size=BATCH_LIMIT))
+        self.commit_batched([("delete", r, None) for r in refs])
+        return len(refs)
+
+    @metrics.timed("firestore_flush")
+    def flush(self, timeout: float = 10.0) -> bool:
+        return self._writes.flush(timeout)
+
+    def _flush_user(self, user_id: str, timeout: float = 10.0) -> bool:
+        """Wait for this user's queued writes only; other users' commits never block a read."""
+        if not self._writes.pending(user_id):
+            return True
+        with metrics.span("firestore_flush"):
+            return self._writes.flush(timeout, key=user_id)
+
+    def close(self, timeout: float = 10.0) -> bool:
+        """Commit queued writes and stop the writer."""
+        return self._writes.drain(timeout)
+
+    def stats(self) -> dict:
+        return {"write_queue": self._writes.stats()}
@@ -0,0 +1,54 @@
+import importlib.util
+import os
+
+# "auto" picks the fastest installed backend; any key of BACKENDS forces one
+HTML_PARSER = os.getenv("HTML_PARSER", "auto")
+
+# BeautifulSoup tree builder name -> module that must be importable for it
+BACKENDS = {
+    "lxml": "lxml",               # C-backed (libxml2), several times faster than html.parser
+    "html.parser": None,          # pure-Python stdlib fallback, always available
+}
+PREFERENCE = ("lxml", "html.parser")
+
+_selected = None
+
+
+def available_backends() -> list:
+    return [name for name in PREFERENCE
+            if BACKENDS[name] is None or importlib.util.find_spec(BACKENDS[name]) is not None]
+
+
+def select_backend(name: str = None) -> str:
+    """Resolve a backend name ("auto" or explicit) to one that is installed."""
+    name = name or HTML_PARSER
+    available = available_backends()
+    if name != "auto":
+        if name in available:
+            return name
+        print(f"⚠️ HTML parser '{name}' is not installed, falling back to automatic selection")
+    return available[0]
+
+
+def make_soup(markup, backend: str = None):
+    """Parse `markup` with the selected backend (resolved once per process by default).
+
+    bs4 (and lxml) are imported on first use, so processes that never parse HTML never load them.
+    lxml's tree is the reference: html.parser gets the same implied end tags (<li>a<li>b is two items).
+    """
+    global _selected
+    if backend is None:
+        if _selected is None:
+            _selected = select_backend()
+            print(f"✅ Using HTML parser backend: {_selected}")
+        backend = _selected
+    if backend == "html.parser":
+        from utils.implied_end_tags import ImpliedEndTagSoup
+        return ImpliedEndTagSoup(markup, backend)
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(markup, backend)
+
+
+def warm_up():
+    """Import bs4 and the selected parser backend ahead of the first page."""
+    make_soup("<html><body><p>warm-up</p></body></html>")
@@ -0,0 +1,264 @@
+import asyncio
+import importlib.util
+import os
+import socket
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlparse
+import anyio
+import httpcore
+import httpx
+from utils.ttl_cache import TTLCache
+
+# One process-wide client layer shared by google_searcher, category_finder and scrape_a_link.
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "40"))
+KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "10"))
+# Per-host overrides, e.g. "www.googleapis.com=20,en.wikipedia.org=4"
+HOST_LIMITS = {
+    host.strip(): int(limit)
+    for host, _, limit in (pair.partition("=") for pair in os.getenv("HTTP_HOST_LIMITS", "").split(","))
+    if host.strip() and limit.strip().isdigit()
+}
+# HTTP/2 is negotiated via ALPN, so servers without it simply stay on HTTP/1.1
+HTTP2 = os.getenv("HTTP2", "auto")
+# Resolved addresses are reused for this many seconds by the shared clients only ("0" = off).
+# getaddrinfo does not report record TTLs, so keep this short for hosts that move often.
+DNS_CACHE_TTL = float(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+# Hosts whose limiter and counters are kept; past this, hosts with no request in flight are dropped
+MAX_TRACKED_HOSTS = int(os.getenv("HTTP_MAX_TRACKED_HOSTS", "1000"))
+# Busiest hosts listed by pool_stats()
+STATS_HOSTS = 50
+
+_clients_lock = threading.Lock()
+_client = None
+_async_client = None
+_host_sems = {}
+_async_host_sems = {}
+_host_users = {}  # host -> requests holding or waiting for its slot (pruned only at 0)
+_stats = defaultdict(lambda: {"requests": 0, "errors": 0, "in_flight": 0, "http2": 0})
+_stats_lock = threading.Lock()  # guards the three per-host maps above and _stats
+
+_dns_cache = TTLCache(max_entries=512, ttl=DNS_CACHE_TTL)
+
+
+def _lookup(host: str, port: int) -> list:
+    """getaddrinfo for host:port (distinct addresses, in order), stored in the DNS cache."""
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except OSError as e:
+        raise httpcore.ConnectError(str(e)) from e  # surfaces as httpx.ConnectError, as before
+    addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    _dns_cache.set((host, port), addresses)
+    return addresses
+
+
+def _resolve(host: str, port: int) -> list:
+    """Addresses of host:port, cached for DNS_CACHE_TTL seconds."""
+    addresses = _dns_cache.get((host, port))
+    return _lookup(host, port) if addresses is None else addresses
+
+
+class _CachedDNSBackend(httpcore.SyncBackend):
+    """httpcore network backend of the shared sync client: connects to cached addresses.
+
+    TLS still uses the request's host name for SNI and certificate checks.
+    """
+
+    def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        error = None
+        for address in _resolve(host, port):
+            try:
+                return super().connect_tcp(address, port, timeout, local_address, socket_options)
+            except httpcore.ConnectError as e:
+                error = e
+        _dns_cache.delete((host, port))  # every address failed: look the host up again next time
+        raise error
+
+
+class _AsyncCachedDNSBackend(httpcore.AnyIOBackend):
+    """Async counterpart of _CachedDNSBackend; lookups that miss run on a worker thread."""
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        addresses = _dns_cache.get((host, port))
+        if addresses is None:
+            addresses = await anyio.to_thread.run_sync(_lookup, host, port)
+        error = None
+        for address in addresses:
+            try:
+                return await super().connect_tcp(address, port, timeout, local_address, socket_options)
+            except httpcore.ConnectError as e:
+                error = e
+        _dns_cache.delete((host, port))
+        raise error
+
+
+def _http2_enabled() -> bool:
+    if HTTP2 == "auto":
+        return importlib.util.find_spec("h2") is not None
+    return HTTP2.lower() in ("1", "true", "yes")
+
+
+def _transport(asynchronous: bool = False):
+    options = {
+        "http2": _http2_enabled(),
+        "limits": httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+    }
+    transport = httpx.AsyncHTTPTransport(**options) if asynchronous else httpx.HTTPTransport(**options)
+    if DNS_CACHE_TTL > 0:
+        # httpx has no public option for httpcore's network backend; the pool reads it per new connection
+        # (httpcore is pinned in requirements.txt for this). Scoped to these clients: other libraries in
+        # the process (google-auth, firebase, genai) resolve as usual.
+        pool = getattr(transport, "_pool", None)
+        if hasattr(pool, "_network_backend"):
+            pool._network_backend = _AsyncCachedDNSBackend() if asynchronous else _CachedDNSBackend()
+        else:
+            print("⚠️ This httpcore version has no pluggable network backend; DNS cache disabled")
+    return transport
+
+
+def get_client() -> httpx.Client:
+    """Shared sync client (thread-safe) with connection pooling and keep-alive."""
+    global _client
+    if _client is None:
+        with _clients_lock:
+            if _client is None:
+                _client = httpx.Client(transport=_transport(), follow_redirects=True)
+    return _client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Shared async client; created on first use inside the server's event loop."""
+    global _async_client
+    if _async_client is None:
+        with _clients_lock:
+            if _async_client is None:
+                _async_client = httpx.AsyncClient(transport=_transport(asynchronous=True), follow_redirects=True)
+    return _async_client
+
+
+def host_limit(host: str) -> int:
+    return HOST_LIMITS.get(host, PER_HOST_LIMIT)
+
+
+def _record(host: str, delta_in_flight: int, response=None, error: bool = False):
+    with _stats_lock:
+        entry = _stats[host]
+        entry["in_flight"] += delta_in_flight
+        if delta_in_flight < 0:
+            entry["requests"] += 1
+            entry["errors"] += int(error)
+            if response is not None and response.http_version == "HTTP/2":
+                entry["http2"] += 1
+
+
+def _enter_host(host: str, sems: dict, make_sem):
+    """The host's semaphore, counting the caller as a user so it is not pruned meanwhile."""
+    with _stats_lock:
+        _host_users[host] = _host_users.get(host, 0) + 1
+        sem = sems.get(host)
+        if sem is None:
+            sem = sems[host] = make_sem(host_limit(host))
+        return sem
+
+
+def _leave_host(host: str):
+    with _stats_lock:
+        _host_users[host] -= 1
+        if len(_stats) > MAX_TRACKED_HOSTS or len(_host_users) > MAX_TRACKED_HOSTS:
+            # Scraping visits an open-ended set of hosts; forget the ones nobody is using
+            for idle in [name for name, users in _host_users.items() if users == 0]:
+                del _host_users[idle]
+                _host_sems.pop(idle, None)
+                _async_host_sems.pop(idle, None)
+                _stats.pop(idle, None)
+
+
+@contextmanager
+def _host_slot(host: str):
+    sem = _enter_host(host, _host_sems, threading.BoundedSemaphore)
+    try:
+        with sem:
+            yield
+    finally:
+        _leave_host(host)
+
+
+@asynccontextmanager
+async def _async_host_slot(host: str):
+    sem = _enter_host(host, _async_host_sems, asyncio.Semaphore)
+    try:
+        async with sem:
+            yield
+    finally:
+        _leave_host(host)
+
+
+def request(method: str, url: str, **kwargs) -> httpx.Response:
+    """Send a request on the shared pool, respecting the per-host limit."""
+    host = urlparse(url).netloc
+    with _host_slot(host):
+        _record(host, 1)
+        response = None
+        try:
+            response = get_client().request(method, url, **kwargs)
+            return response
+        finally:
+            _record(host, -1, response, error=response is None)
+
+
+@contextmanager
+def stream(method: str, url: str, **kwargs):
+    """Streaming request on the shared pool; the body is read lazily by the caller."""
+    host = urlparse(url).netloc
+    with _host_slot(host):
+        _record(host, 1)
+        response = None
+        try:
+            with get_client().stream(method, url, **kwargs) as response:
+                yield response
+        finally:
+            _record(host, -1, response, error=response is None)
+
+
+async def arequest(method: str, url: str, **kwargs) -> httpx.Response:
+    """Async counterpart of request()."""
+    host = urlparse(url).netloc
+    async with _async_host_slot(host):
+        _record(host, 1)
+        response = None
+        try:
+            response = await get_async_client().request(method, url, **kwargs)
+            return response
+        finally:
+            _record(host, -1, response, error=response is None)
+
+
+def _pool_connections(client) -> dict:
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    idle = sum(1 for c in connections if getattr(c, "is_idle", lambda: False)())
+    return {"open": len(connections), "idle": idle}
+
+
+def pool_stats() -> dict:
+    """Per-host request counters (busiest STATS_HOSTS) plus open/idle connections of both pools."""
+    with _stats_lock:
+        tracked = len(_stats)
+        busiest = sorted(_stats.items(), key=lambda item: item[1]["requests"], reverse=True)[:STATS_HOSTS]
+        hosts = {host: dict(entry) for host, entry in busiest}
+    return {
+        "http2": _http2_enabled(),
+        "limits": {"max_connections": MAX_CONNECTIONS, "max_keepalive": MAX_KEEPALIVE, "per_host": PER_HOST_LIMIT, "host_overrides": HOST_LIMITS},
+        "sync_pool": _pool_connections(_client) if _client else None,
+        "async_pool": _pool_connections(_async_client) if _async_client else None,
+        "dns_cache": _dns_cache.stats(),
+        "hosts_tracked": tracked,
+        "hosts": hosts,
+    }
@@ -0,0 +1,58 @@
+from bs4 import BeautifulSoup
+
+# Open element -> start tags that implicitly close it, as libxml2 (the lxml backend) does it.
+# html.parser nests instead (<li>a<li>b becomes li > li), which changes the extracted sections,
+# so the html.parser backend applies the same table and both backends build the same tree.
+CLOSED_BY = {name: frozenset(tags.split()) for name, tags in {
+    "a": "a fieldset table td th",
+    "address": "dd dl dt form li ul",
+    "b": "center p td th",
+    "big": "p",
+    "caption": "col colgroup tbody tfoot thead tr",
+    "colgroup": "colgroup tbody tfoot thead tr",
+    "dd": "dt",
+    "dir": "dd dl dt form ul",
+    "dl": "form li",
+    "dt": "dd dl",
+    "font": "center td th",
+    "form": "form",
+    "h1": "fieldset form li p table",
+    "h2": "fieldset form li p table",
+    "h3": "fieldset form li p table",
+    "h4": "fieldset form li p table",
+    "h5": "fieldset form li p table",
+    "h6": "fieldset form li p table",
+    "i": "center p td th",
+    "legend": "fieldset",
+    "li": "li",
+    "menu": "dd dl dt form ul",
+    "ol": "form",
+    "option": "optgroup option",
+    "p": "address blockquote caption center col colgroup dd dir div dl dt fieldset form h1 h2 h3 h4 h5 h6 "
+         "hr li menu ol p pre table tbody td tfoot th tr ul",
+    "pre": "dd dl dt fieldset form li table ul",
+    "s": "p",
+    "small": "p",
+    "span": "td th",
+    "strike": "p",
+    "tbody": "tbody tfoot",
+    "td": "tbody td tfoot th tr",
+    "tfoot": "tbody",
+    "th": "tbody td tfoot th tr",
+    "thead": "tbody tfoot",
+    "tr": "tbody tfoot tr",
+    "tt": "p",
+    "u": "p td th",
+    "ul": "address form menu pre",
+}.items()}
+
+
+class ImpliedEndTagSoup(BeautifulSoup):
+    """BeautifulSoup that closes elements on the start tags in CLOSED_BY (for html.parser)."""
+
+    def handle_starttag(self, name, namespace, nsprefix, attrs, *args, **kwargs):
+        self.endData()
+        # Like libxml2: keep closing the current element while the new tag implies its end
+        while name in CLOSED_BY.get(self.currentTag.name, ()):
+            self.popTag()
+        return super().handle_starttag(name, namespace, nsprefix, attrs, *args, **kwargs)
@@ -0,0 +1,200 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+# Server-Timing response headers ("0" keeps only the /metrics histograms)
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1").lower() not in ("0", "false", "no")
+PREFIX = os.getenv("METRICS_PREFIX", "halfcircuit")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds: sub-millisecond cache and walk stages up to slow origins and Gemini calls
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (stage, seconds) spans of the request being handled; None outside a request
+_timings = ContextVar("server_timings", default=None)
+
+
+class Histogram:
+    """Prometheus-style histogram with labels; observe() is a lock and a bisect."""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple, buckets: tuple = BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *labels):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += seconds
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            base = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, labels))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+            cumulative += values[-2]
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {cumulative}')
+            labelset = f"{{{base}}}" if base else ""
+            lines.append(f"{self.name}_sum{labelset} {values[-1]:.6f}")
+            lines.append(f"{self.name}_count{labelset} {cumulative}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_stages = Histogram(f"{PREFIX}_stage_duration_seconds", "Time spent in one stage of a request.", ("stage",))
+_requests = Histogram(f"{PREFIX}_request_duration_seconds", "Total time per request, by route.", ("method", "route", "status"))
+
+
+def observe(stage: str, seconds: float):
+    """Record one span: always into /metrics, and into the current request's Server-Timing."""
+    _stages.observe(seconds, stage)
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def span(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - started)
+
+
+def timed(stage: str):
+    """Decorator form of span() for sync functions."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def recording():
+    """Collect the spans of a block into a list (e.g. in a parse worker, to send back)."""
+    timings = []
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def replay(timings):
+    """observe() spans measured elsewhere (a worker process) in this process and request."""
+    for stage, seconds in timings:
+        observe(stage, seconds)
+
+
+# httpx trace events (connection phases inside the shared client) -> stage suffixes
+_TRACE_PHASES = {
+    "connection.connect_tcp": "connect",        # DNS lookup + TCP handshake
+    "connection.start_tls": "tls",
+    "http11.receive_response_headers": "wait",  # request sent -> first response bytes
+    "http2.receive_response_headers": "wait",
+}
+
+
+def _trace_event(prefix: str, started: dict, name: str):
+    phase, _, edge = name.rpartition(".")
+    suffix = _TRACE_PHASES.get(phase)
+    if suffix is None:
+        return
+    if edge == "started":
+        started[phase] = time.perf_counter()
+    elif edge in ("complete", "failed") and phase in started:
+        observe(f"{prefix}_{suffix}", time.perf_counter() - started.pop(phase))
+
+
+def http_trace(prefix: str) -> dict:
+    """httpx `extensions` that time DNS/TCP connect, TLS and server wait as `<prefix>_*` spans."""
+    started = {}
+
+    def trace(name, info):
+        _trace_event(prefix, started, name)
+    return {"trace": trace}
+
+
+def http_trace_async(prefix: str) -> dict:
+    started = {}
+
+    async def trace(name, info):
+        _trace_event(prefix, started, name)
+    return {"trace": trace}
+
+
+def server_timing_header(timings: list, total: float) -> str:
+    """Spans summed per stage, in first-seen order, plus the whole request as `app`."""
+    merged = {}
+    for stage, seconds in timings:
+        entry = merged.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+    parts = [f'{stage};dur={seconds * 1000:.1f}' + (f';desc="x{count}"' if count > 1 else "")
+             for stage, (seconds, count) in merged.items()]
+    parts.append(f"app;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware: per-request span collection, Server-Timing header and request histogram.
+
+    Streaming responses send their headers first, so their Server-Timing only
+    covers the spans finished before the first chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        timings = []
+        token = _timings.set(timings)
+        status = [500]
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if SERVER_TIMING:
+                    header = server_timing_header(list(timings), time.perf_counter() - started)
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", header.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            # The route template (not the raw path) keeps user ids out of the label set
+            route = getattr(scope.get("route"), "path", "unmatched")
+            _requests.observe(time.perf_counter() - started, scope["method"], route, status[0])
+
+
+def render_metrics() -> str:
+    """All histograms in the Prometheus text exposition format."""
+    return "\n".join(_stages.render() + _requests.render()) + "\n"
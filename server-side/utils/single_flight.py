@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers that arrive while it
+    is in flight wait for and share its result (or exception). Nothing is
+    cached afterwards: the next call after completion runs again.
+    do() is for threads, ado() for coroutines on the server's event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+        self._stats = {"executions": 0, "coalesced": 0, "errors": 0, "max_waiters": 0}
+
+    def _joined(self, waiters: int):
+        self._stats["coalesced"] += 1
+        self._stats["max_waiters"] = max(self._stats["max_waiters"], waiters)
+
+    def do(self, key, fn, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["executions"] += 1
+            else:
+                call.waiters += 1
+                self._joined(call.waiters)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            self._stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    async def ado(self, key, fn, *args):
+        call = self._tasks.get(key)
+        if call is None:
+            self._stats["executions"] += 1
+            call = self._tasks[key] = _Call()
+            call.result = asyncio.ensure_future(fn(*args))
+
+            def finished(task):
+                self._tasks.pop(key, None)
+                if not task.cancelled() and task.exception() is not None:
+                    self._stats["errors"] += 1
+            call.result.add_done_callback(finished)
+        else:
+            call.waiters += 1
+            self._joined(call.waiters)
+        # Shielded so one caller disconnecting does not cancel the call for the others
+        return await asyncio.shield(call.result)
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._calls) + len(self._tasks)
+        return {**self._stats, "in_flight": in_flight}
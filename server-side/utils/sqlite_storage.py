@@ -0,0 +1,138 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from utils import metrics
+from utils.storage import COLLECTIONS, StorageBackend
+
+DB_PATH = os.getenv("SQLITE_STORAGE_PATH", "halfcircuit.db")
+# Fixed-width UTC text so string order is time order (isoformat() drops zero microseconds)
+TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f+00:00"
+# Columns are TEXT; dict/list values (e.g. a result's category) are stored as JSON behind this marker
+JSON_MARKER = "\x1ejson:"
+
+
+def to_db_time(value: datetime) -> str:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime(TIME_FORMAT)
+
+
+def from_db_time(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def to_db_value(value):
+    if isinstance(value, (dict, list, tuple)):
+        return JSON_MARKER + json.dumps(value, separators=(",", ":"), default=str)
+    return value
+
+
+def from_db_value(value):
+    if isinstance(value, str) and value.startswith(JSON_MARKER):
+        return json.loads(value[len(JSON_MARKER):])
+    return value
+
+
+class SQLiteStorage(StorageBackend):
+    """One table per collection in an embedded SQLite file (WAL mode).
+
+    Every list is read through an index on (user_id, <order field>, id), so a
+    page is an index range scan and a count never touches the rows.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = None):
+        self.path = path or DB_PATH
+        self._local = threading.local()
+        self._stats = {"writes": 0, "reads": 0}
+        conn = self._conn()
+        for collection, spec in COLLECTIONS.items():
+            order_field = spec["order_field"]
+            columns = ", ".join(f"{f} TEXT" for f in spec["fields"] if f != order_field)
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {collection} ("
+                f"id TEXT PRIMARY KEY, user_id TEXT NOT NULL, {order_field} TEXT NOT NULL, {columns})"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{collection}_user_time "
+                f"ON {collection} (user_id, {order_field} DESC, id DESC)"
+            )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers run alongside the writer
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    @metrics.timed("sqlite_add")
+    def add(self, user_id: str, collection: str, data: dict) -> str:
+        order_field = COLLECTIONS[collection]["order_field"]
+        doc_id = uuid.uuid4().hex[:20]
+        row = {field: to_db_value(value) for field, value in data.items()}
+        row[order_field] = to_db_time(data[order_field])
+        columns = ["id", "user_id", *row]
+        conn = self._conn()
+        conn.execute(
+            f"INSERT INTO {collection} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            (doc_id, user_id, *row.values()),
+        )
+        conn.commit()
+        self._stats["writes"] += 1
+        return doc_id
+
+    @metrics.timed("sqlite_page")
+    def page(self, user_id: str, collection: str, limit=None, cursor=None, fields=None) -> list:
+        spec = COLLECTIONS[collection]
+        order_field = spec["order_field"]
+        columns = ["id", *(fields or spec["fields"])]
+        sql = f"SELECT {', '.join(columns)} FROM {collection} WHERE user_id = ?"
+        params = [user_id]
+        if cursor:
+            # Keyset pagination: a row-value comparison seeks straight into the index
+            sql += f" AND ({order_field}, id) < (?, ?)"
+            params += [to_db_time(cursor["value"]), cursor["id"]]
+        sql += f" ORDER BY {order_field} DESC, id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        rows = self._conn().execute(sql, params).fetchall()
+        self._stats["reads"] += 1
+        items = []
+        for row in rows:
+            d = {field: from_db_value(value) for field, value in dict(row).items()}
+            d[order_field] = from_db_time(d[order_field])
+            items.append(d)
+        return items
+
+    @metrics.timed("sqlite_count")
+    def count(self, user_id: str, collection: str) -> int:
+        row = self._conn().execute(f"SELECT COUNT(*) FROM {collection} WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0]
+
+    @metrics.timed("sqlite_delete")
+    def delete(self, user_id: str, collection: str, doc_id: str):
+        conn = self._conn()
+        conn.execute(f"DELETE FROM {collection} WHERE user_id = ? AND id = ?", (user_id, doc_id))
+        conn.commit()
+        self._stats["writes"] += 1
+
+    @metrics.timed("sqlite_clear")
+    def clear(self, user_id: str, collection: str) -> int:
+        conn = self._conn()
+        deleted = conn.execute(f"DELETE FROM {collection} WHERE user_id = ?", (user_id,)).rowcount
+        conn.commit()
+        self._stats["writes"] += 1
+        return deleted
+
+    def stats(self) -> dict:
+        return {"path": self.path, **self._stats}
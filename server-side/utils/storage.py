@@ -0,0 +1,268 @@
+import base64
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from utils.ttl_cache import TTLCache
+
+# "firestore" (default) or "sqlite" for a single-node deployment without WAN round-trips
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firestore").lower()
+MAX_PAGE_SIZE = 500
+# Per collection: the ordering field (it backs the cursor and is always returned)
+# and the fields a caller may project
+COLLECTIONS = {
+    "bookmarks": {"order_field": "saved_at",
+                  "fields": ("title", "link", "snippet", "favicon", "category", "site", "saved_at")},
+    "recent_searches": {"order_field": "timestamp", "fields": ("query", "timestamp")},
+}
+# Read-through cache of each user's lists; the TTL only matters for writes made by other instances
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "2000"))
+PAGES_PER_ENTRY = 8
+
+
+class StorageBackend:
+    """Per-user collections of documents, newest first.
+
+    Implementations: FirestoreStorage (utils.firebase_manager) and
+    SQLiteStorage (utils.sqlite_storage). `collection` is a key of
+    COLLECTIONS; `cursor` is a decoded cursor, {"value": datetime, "id": str}.
+    """
+
+    name = "base"
+
+    def add(self, user_id: str, collection: str, data: dict) -> str:
+        """Insert a document and return its id."""
+        raise NotImplementedError
+
+    def page(self, user_id: str, collection: str, limit=None, cursor=None, fields=None) -> list:
+        """Documents (dicts with "id") ordered by the collection's order field, descending."""
+        raise NotImplementedError
+
+    def count(self, user_id: str, collection: str) -> int:
+        raise NotImplementedError
+
+    def delete(self, user_id: str, collection: str, doc_id: str):
+        raise NotImplementedError
+
+    def clear(self, user_id: str, collection: str) -> int:
+        """Delete every document of the collection; returns how many were deleted."""
+        raise NotImplementedError
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait for buffered writes (if the backend buffers any)."""
+        return True
+
+    def close(self, timeout: float = 10.0) -> bool:
+        return True
+
+    def stats(self) -> dict:
+        return {}
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name: str) -> StorageBackend:
+    # Imported here so only the selected backend's dependencies are loaded
+    if name == "sqlite":
+        from utils.sqlite_storage import SQLiteStorage
+        return SQLiteStorage()
+    if name == "firestore":
+        from utils.firebase_manager import FirestoreStorage
+        return FirestoreStorage()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {name}")
+
+
+def get_backend() -> StorageBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(STORAGE_BACKEND)
+                print(f"✅ Using storage backend: {_backend.name}")
+    return _backend
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def encode_cursor(value, doc_id: str) -> str:
+    """Opaque page cursor: the last item's ordering value and document id."""
+    raw = json.dumps({"v": value.isoformat(), "id": doc_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return {"value": datetime.fromisoformat(raw["v"]), "id": raw["id"]}
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+# (user_id, collection) -> {"pages": OrderedDict((limit, cursor, fields) -> page), "count": int | None}
+_user_cache = TTLCache(max_entries=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL)
+_user_cache_lock = threading.Lock()
+_user_cache_counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _new_entry(count=None):
+    return {"pages": OrderedDict(), "count": count}
+
+
+def _cache_entry(user_id: str, collection: str) -> dict:
+    with _user_cache_lock:
+        entry = _user_cache.get((user_id, collection))
+        if entry is None:
+            entry = _new_entry()
+            _user_cache.set((user_id, collection), entry)
+        return entry
+
+
+def _invalidate(user_id: str, collection: str, patch_count=None):
+    """Drop a user's cached pages of `collection`, keeping the count patched by `patch_count`.
+
+    The entry is replaced rather than cleared, so a read that started before
+    the write stores its (stale) result in the detached entry, not the cache.
+    """
+    key = (user_id, collection)
+    with _user_cache_lock:
+        _user_cache_counters["invalidations"] += 1
+        entry = _user_cache.get(key)
+        if entry is None:
+            return
+        count = entry["count"]
+        count = patch_count(count) if patch_count and count is not None else None
+        _user_cache.set(key, _new_entry(count))
+
+
+def _cached(entry: dict, sub_key, load):
+    with _user_cache_lock:
+        value = entry["count"] if sub_key == "count" else entry["pages"].get(sub_key)
+        if value is not None:
+            _user_cache_counters["hits"] += 1
+            if sub_key != "count":
+                entry["pages"].move_to_end(sub_key)
+            return value
+        _user_cache_counters["misses"] += 1
+    value = load()
+    with _user_cache_lock:
+        if sub_key == "count":
+            entry["count"] = value
+        else:
+            entry["pages"][sub_key] = value
+            while len(entry["pages"]) > PAGES_PER_ENTRY:
+                entry["pages"].popitem(last=False)
+    return value
+
+
+def user_cache_stats() -> dict:
+    with _user_cache_lock:
+        counters = dict(_user_cache_counters)
+        stats = _user_cache.stats()
+    lookups = counters["hits"] + counters["misses"]
+    return {"size": stats["size"], "max_entries": stats["max_entries"], "evictions": stats["evictions"],
+            **counters, "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0}
+
+
+def _load_page(user_id, collection, limit, cursor, fields) -> dict:
+    spec = COLLECTIONS[collection]
+    if fields:
+        unknown = set(fields) - set(spec["fields"])
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        fields = sorted(set(fields) | {spec["order_field"]})
+    limit = min(int(limit), MAX_PAGE_SIZE) if limit else None
+    decoded = decode_cursor(cursor) if cursor else None
+    items = get_backend().page(user_id, collection, limit, decoded, fields)
+    last = items[-1] if limit and len(items) == limit else None
+    next_cursor = encode_cursor(last[spec["order_field"]], last["id"]) if last and last.get(spec["order_field"]) else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def _page(user_id: str, collection: str, limit=None, cursor=None, fields=None) -> dict:
+    """One page of a user's collection, newest first, with optional projection (cached per user)."""
+    sub_key = (limit, cursor, tuple(sorted(fields)) if fields else None)
+    entry = _cache_entry(user_id, collection)
+    return _cached(entry, sub_key, lambda: _load_page(user_id, collection, limit, cursor, fields))
+
+
+def _count(user_id: str, collection: str) -> int:
+    return _cached(_cache_entry(user_id, collection), "count", lambda: get_backend().count(user_id, collection))
+
+
+def store_recent_search(user_id: str, query: str):
+    """Store a recent search for a given user. Returns document id."""
+    doc_id = get_backend().add(user_id, "recent_searches", {
+        "query": query,
+        "timestamp": utc_now(),
+    })
+    # Invalidated after the write: later reads flush buffered writes, so they see this entry
+    _invalidate(user_id, "recent_searches", lambda count: count + 1)
+    return doc_id
+
+def store_bookmark(user_id: str, result: dict):
+    """Save a bookmarked search result. Returns document id."""
+    doc_id = get_backend().add(user_id, "bookmarks", {
+        "title": result.get("title"),
+        "link": result.get("link"),
+        "snippet": result.get("snippet"),
+        "favicon": result.get("favicon"),
+        "category": result.get("category"),
+        "site": result.get("site"),
+        "saved_at": utc_now(),
+    })
+    _invalidate(user_id, "bookmarks", lambda count: count + 1)
+    return doc_id
+
+def get_recent_searches_page(user_id: str, limit=10, cursor=None, fields=None) -> dict:
+    """Page of recent searches: {"items": [...], "next_cursor": str | None}."""
+    return _page(user_id, "recent_searches", limit, cursor, fields)
+
+def get_recent_searches(user_id: str, limit=10):
+    """Fetch recent searches including document ids."""
+    return get_recent_searches_page(user_id, limit)["items"]
+
+def count_recent_searches(user_id: str) -> int:
+    return _count(user_id, "recent_searches")
+
+def get_bookmarks_page(user_id: str, limit=None, cursor=None, fields=None) -> dict:
+    """Page of bookmarks (all of them when `limit` is None)."""
+    return _page(user_id, "bookmarks", limit, cursor, fields)
+
+def get_bookmarks(user_id: str):
+    """Fetch all bookmarks including document ids."""
+    return get_bookmarks_page(user_id)["items"]
+
+def count_bookmarks(user_id: str) -> int:
+    return _count(user_id, "bookmarks")
+
+def delete_recent_search(user_id: str, doc_id: str):
+    get_backend().delete(user_id, "recent_searches", doc_id)
+    _invalidate(user_id, "recent_searches")
+
+def clear_recent_searches(user_id: str):
+    """Delete all recent searches of a user. Returns the number deleted."""
+    deleted = get_backend().clear(user_id, "recent_searches")
+    _invalidate(user_id, "recent_searches", lambda count: 0)
+    return deleted
+
+def delete_bookmark(user_id: str, doc_id: str):
+    get_backend().delete(user_id, "bookmarks", doc_id)
+    _invalidate(user_id, "bookmarks")
+
+
+def close_storage(timeout: float = 10.0) -> bool:
+    """Shutdown hook: flush buffered writes of the active backend."""
+    return _backend.close(timeout) if _backend is not None else True
+
+
+def storage_stats() -> dict:
+    backend = _backend  # not get_backend(): a stats call should not create (connect) the backend
+    if backend is None:
+        return {"backend": None}
+    return {"backend": backend.name, **backend.stats()}
@@ -0,0 +1,142 @@
+import atexit
+import threading
+import time
+from collections import Counter, deque
+
+
+class WriteBehindQueue:
+    """Background queue that hands pending writes to `commit(ops)` in batches.
+
+    Ops are committed in submission order by one daemon thread, at most
+    `max_batch` per commit, as soon as a batch fills or `flush_interval`
+    seconds after the first pending op. A failed commit is retried
+    `retries` times with backoff before its ops are dropped (and counted).
+    Ops may be submitted under a key (e.g. a user id) so flush(key=...)
+    waits for that key's ops only.
+    """
+
+    def __init__(self, commit, max_batch: int = 500, flush_interval: float = 0.5,
+                 max_pending: int = 10000, retries: int = 3, name: str = "write-behind"):
+        self._commit = commit
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.retries = retries
+        self.name = name
+        self._ops = deque()  # (key, op)
+        self._pending_by_key = Counter()  # key -> queued or committing ops
+        self._cond = threading.Condition()
+        self._committing = 0
+        self._flush_waiters = 0
+        self._thread = None
+        self._stopped = False
+        self._stats = {"enqueued": 0, "rejected": 0, "committed": 0, "failed": 0,
+                       "batches": 0, "retries": 0, "last_flush_ms": None, "max_flush_ms": 0.0}
+
+    def submit(self, op, key=None) -> bool:
+        """Queue `op`; False when the queue is full or stopped (caller should write inline)."""
+        with self._cond:
+            if self._stopped or len(self._ops) >= self.max_pending:
+                self._stats["rejected"] += 1
+                return False
+            self._ops.append((key, op))
+            if key is not None:
+                self._pending_by_key[key] += 1
+            self._stats["enqueued"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+                atexit.register(self.drain)
+            if len(self._ops) >= self.max_batch:
+                self._cond.notify_all()
+        return True
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._ops and not self._stopped:
+                self._cond.wait()
+            # Give the batch a moment to fill unless someone is flushing or draining
+            deadline = time.monotonic() + self.flush_interval
+            while (self._ops and len(self._ops) < self.max_batch
+                   and not self._stopped and not self._flush_waiters):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = [self._ops.popleft() for _ in range(min(self.max_batch, len(self._ops)))]
+            self._committing = len(batch)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return  # stopped and empty
+            started = time.perf_counter()
+            ops = [op for _, op in batch]
+            for attempt in range(self.retries + 1):
+                try:
+                    self._commit(ops)
+                    self._stats["committed"] += len(batch)
+                    break
+                except Exception as e:
+                    if attempt == self.retries:
+                        self._stats["failed"] += len(batch)
+                        print(f"⚠️ {self.name}: dropped {len(batch)} writes after {attempt + 1} attempts: {e}")
+                    else:
+                        self._stats["retries"] += 1
+                        time.sleep(0.2 * 2 ** attempt)
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            with self._cond:
+                self._committing = 0
+                # Committed or dropped, these ops are no longer pending
+                for key, _ in batch:
+                    if key is not None:
+                        self._pending_by_key[key] -= 1
+                        if not self._pending_by_key[key]:
+                            del self._pending_by_key[key]
+                self._stats["batches"] += 1
+                self._stats["last_flush_ms"] = elapsed_ms
+                self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], elapsed_ms)
+                self._cond.notify_all()
+
+    def pending(self, key) -> int:
+        """Ops submitted under `key` that are not committed yet."""
+        with self._cond:
+            return self._pending_by_key.get(key, 0)
+
+    def flush(self, timeout: float = 10.0, key=None) -> bool:
+        """Wait until every op queued so far (or every op of `key`) is committed; False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if self._thread is None:
+                return not self._ops
+            if key is not None and not self._pending_by_key.get(key):
+                return True
+            self._flush_waiters += 1
+            self._cond.notify_all()  # cut the fill wait short
+            try:
+                while self._pending_by_key.get(key) if key is not None else (self._ops or self._committing):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self._flush_waiters -= 1
+        return True
+
+    def drain(self, timeout: float = 10.0) -> bool:
+        """Shutdown: stop accepting writes and commit what is pending."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {**self._stats, "pending": len(self._ops) + self._committing,
+                    "max_batch": self.max_batch, "stopped": self._stopped}